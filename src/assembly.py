@@ -0,0 +1,123 @@
+from itertools import product
+
+import numpy as np
+
+from .topology import ELEMENT_DTYPE
+
+# Full-umbrella assembly. hypar(), pyramid() and dome() generate a single tympan wedge centred on the x axis and
+# spanning -psi..psi, so the umbrella is Ne copies of that wedge rotated by 2*psi*k. Neighbouring copies share the
+# nodes on their common rib (and all of them share the apex); those are merged with a tolerance-based spatial hash
+# and the element connectivity is renumbered to the merged node ids.
+
+
+def rotation_matrices(Ne):
+    # Batched form of rotate(x, y, 2*psi, k) for k = 0..Ne-1, shape (Ne, 2, 2).
+    theta = 2*np.pi/Ne*np.arange(Ne)
+    c, s = np.cos(theta), np.sin(theta)
+    return np.stack((np.stack((c, -s), axis=-1), np.stack((s, c), axis=-1)), axis=1)
+
+
+def _cell_keys(cells):
+    # Collapse integer (x, y, z) cells to one int64 per point so np.unique can work on a flat array.
+    cells = cells - cells.min(axis=0)
+    extent = cells.max(axis=0) + 1
+    if np.prod(extent.astype(float)) < 2**62:
+        return cells[:, 0]*(extent[1]*extent[2]) + cells[:, 1]*extent[2] + cells[:, 2]
+    return np.unique(cells, axis=0, return_inverse=True)[1].ravel()
+
+
+def merge_nodes(points, tol):
+    # Returns, for every point, the index of the lowest-indexed point it was merged with. Points are hashed into cubic
+    # cells of size tol on 8 grids, each shifted by half a cell along a different subset of axes. Any two points closer
+    # than tol/2 along every axis share a cell on at least one grid, and points in a common cell are never further than
+    # tol apart per axis. Groups found on different grids are chained together by propagating the minimum label.
+    n = len(points)
+    labels = np.arange(n)
+    if n == 0:
+        return labels
+    scaled = points/tol
+
+    changed = True
+    while changed:
+        changed = False
+        for shift in product((0.0, 0.5), repeat=3):
+            keys = _cell_keys(np.floor(scaled + shift).astype(np.int64))
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            group_min = np.minimum.reduceat(labels[order], starts)
+            group = np.empty(n, dtype=np.intp)
+            group[order] = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, n]))
+            new_labels = group_min[group]
+            if not np.array_equal(new_labels, labels):
+                labels = new_labels
+                changed = True
+
+    # Pointer jumping so every point refers directly to its group's root.
+    while True:
+        jumped = labels[labels]
+        if np.array_equal(jumped, labels):
+            return labels
+        labels = jumped
+
+
+def rib_targets(nodes, Ne, tol=None):
+    # Shared-edge node mapping of the assembly: rib holds the wedge node indices on the two ribs (the lines at +psi and
+    # -psi through the apex), and targets (Ne, len(rib)) the replicated index k*n + j of the node that copy k of each
+    # rib node is merged into, its own index when it is kept. Only those nodes can coincide with a node of another
+    # copy, so the hash is restricted to their copies and the rest of the work stays linear in the mesh size.
+    psi = np.pi/Ne
+    n = len(nodes)
+    xyz = nodes[:, 1:4]
+    if tol is None:
+        tol = 1e-6*max(float(np.abs(xyz).max()) if n else 0.0, 1.0)
+
+    x, y = xyz[:, 0], xyz[:, 1]
+    on_rib = (np.abs(x*np.sin(psi) - y*np.cos(psi)) <= tol) | (np.abs(x*np.sin(psi) + y*np.cos(psi)) <= tol)
+    rib = np.flatnonzero(on_rib)
+    copies = (np.arange(Ne)[:, None]*n + rib).ravel()
+
+    xy, z = replicate(nodes, Ne, rib)
+    candidates = np.column_stack((xy, z))
+    return rib, copies[merge_nodes(candidates, tol)].reshape(Ne, len(rib))
+
+
+def replicate(nodes, Ne, rows=None):
+    # (xy, z) of the Ne rotated copies of the wedge nodes (of nodes[rows] only, if given), with one batched matrix
+    # product: copy k of node j is row k*n + j.
+    xyz = nodes[:, 1:4] if rows is None else nodes[rows, 1:4]
+    xy = np.einsum('kij,nj->kni', rotation_matrices(Ne), xyz[:, :2]).reshape(-1, 2)
+    return xy, np.tile(xyz[:, 2], Ne)
+
+
+def assemble(nodes, elements, Ne, tol=None, rib_map=None):
+
+    # rib_map is a precomputed rib_targets() result, e.g. from a symmetry-compressed mesh (symmetry.py).
+    n = len(nodes)
+    rib, targets = rib_targets(nodes, Ne, tol) if rib_map is None else rib_map
+    xy, z = replicate(nodes, Ne)
+
+    labels = np.arange(Ne*n)
+    labels[(np.arange(Ne)[:, None]*n + rib).ravel()] = np.ravel(targets)
+
+    # Surviving nodes keep their relative order, so the first wedge keeps its original numbering.
+    keep = labels == np.arange(Ne*n)
+    new_id = np.cumsum(keep)  # 1-based id of each surviving node
+    node_id = new_id[labels]
+
+    nod_ij = np.empty((int(keep.sum()), 4))
+    nod_ij[:, 0] = np.arange(1, len(nod_ij)+1)
+    nod_ij[:, 1:3] = xy[keep]
+    nod_ij[:, 3] = z[keep]
+
+    # Renumber connectivity copy by copy; a 0 in the 4th node column (triangle) stays 0.
+    conn = elements[:, 1:].astype(np.int64)
+    offsets = (np.arange(Ne)*n)[:, None, None]
+    global_idx = np.where(conn > 0, conn - 1, 0)[None, :, :] + offsets
+    renumbered = np.where(conn[None, :, :] > 0, node_id[global_idx], 0).reshape(-1, conn.shape[1])
+
+    ele_ij = np.empty((len(renumbered), elements.shape[1]), dtype=ELEMENT_DTYPE)
+    ele_ij[:, 0] = np.arange(1, len(ele_ij)+1)
+    ele_ij[:, 1:] = renumbered
+
+    return nod_ij, ele_ij
@@ -0,0 +1,151 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from .export import XLSX_MAX_ROWS, write_xlsx
+from .pipeline import GEOMETRIES
+from .topology import topology_cache
+
+# Headless benchmarks for the geometry generators and the Excel export (no tkinter, no matplotlib). Each case is timed
+# as the best of a few runs, then run once more under tracemalloc for its peak memory (numpy reports its buffers to
+# tracemalloc, so the mesh arrays are included). Results can be saved as a baseline and later runs compared with it:
+#
+#   python -m src.benchmark --save                 record benchmarks/baseline.json on this machine
+#   python -m src.benchmark                        compare, exit code 1 if any case regressed past --threshold
+#   python -m src.benchmark --N 10 100 --Ne 6      a smaller set of cases
+#
+# Baselines only mean something on the machine that recorded them, so they are not shared between machines.
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'baseline.json')
+DEFAULT_N = [10, 50, 100, 500, 1000, 2000]
+DEFAULT_NE = [4, 6, 12]
+H, RE = 4.0, 1.0
+
+# Differences below these are noise on any machine and never count as regressions.
+MIN_TIME_DELTA = 0.005  # seconds
+MIN_MEMORY_DELTA = 1 << 20  # bytes
+
+
+def measure(func, repeat):
+    # Best wall time over `repeat` runs, then peak traced memory of one more run.
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def generator_case(geometry, Ne, N):
+    def run():
+        # Start from an empty topology cache so every run measures the full generation.
+        topology_cache.clear()
+        geometry(H, RE, Ne, N)
+    return run
+
+
+def xlsx_case(geometry, Ne, N, folder):
+    nodes, elements = geometry(H, RE, Ne, N)
+    filepath = os.path.join(folder, 'bench.xlsx')
+    return lambda: write_xlsx(filepath, nodes, elements)
+
+
+def cases(shapes, N_values, Ne_values, formats, folder):
+    # Yields (case name, callable). The export is timed on a hypar tympan, as the writer cost only depends on the
+    # number of rows.
+    for N in N_values:
+        for Ne in Ne_values:
+            for shape in shapes:
+                yield f"{shape}/Ne={Ne}/N={N}", generator_case(GEOMETRIES[shape][1], Ne, N)
+        if 'xlsx' in formats:
+            if (N + 1)**2 > XLSX_MAX_ROWS:
+                print(f"skipping xlsx/N={N}: {(N + 1)**2} rows exceed the Excel sheet limit", file=sys.stderr)
+                continue
+            yield f"xlsx/N={N}", xlsx_case(GEOMETRIES['hypar'][1], Ne_values[0], N, folder)
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    # Returns a list of regression messages, empty if every case is within the thresholds.
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['time'] > base['time']*(1 + threshold) and result['time'] - base['time'] > MIN_TIME_DELTA:
+            regressions.append(f"{name}: time {base['time']*1000:.1f} -> {result['time']*1000:.1f} ms")
+        if result['peak'] > base['peak']*(1 + memory_threshold) and result['peak'] - base['peak'] > MIN_MEMORY_DELTA:
+            regressions.append(f"{name}: peak memory {base['peak']/1e6:.1f} -> {result['peak']/1e6:.1f} MB")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src.benchmark', description='Time the geometry generators and exporters and check them against a baseline.')
+    parser.add_argument('--shapes', nargs='+', choices=list(GEOMETRIES), default=list(GEOMETRIES), help='Generators to time (default: all)')
+    parser.add_argument('--N', nargs='+', type=int, default=DEFAULT_N, help=f"Elements along apothem (default: {' '.join(map(str, DEFAULT_N))})")
+    parser.add_argument('--Ne', nargs='+', type=int, default=DEFAULT_NE, help=f"Number of sides (default: {' '.join(map(str, DEFAULT_NE))})")
+    parser.add_argument('--formats', nargs='*', choices=['xlsx'], default=['xlsx'], help='Exporters to time (default: xlsx, pass none to skip)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case, the best is kept (default: 3)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file (default: benchmarks/baseline.json)')
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative slowdown before failing (default: 0.25)')
+    parser.add_argument('--memory-threshold', type=float, default=0.10, help='Allowed relative peak memory growth (default: 0.10)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    print(f"{'case':<28}{'time ms':>12}{'peak MB':>12}{'vs baseline':>14}")
+    with tempfile.TemporaryDirectory() as folder:
+        for name, func in cases(args.shapes, args.N, args.Ne, args.formats, folder):
+            seconds, peak = measure(func, args.repeat)
+            results[name] = {'time': seconds, 'peak': peak}
+            change = f"{seconds/baseline[name]['time'] - 1:+.0%}" if name in baseline else ''
+            print(f"{name:<28}{seconds*1000:>12.1f}{peak/1e6:>12.1f}{change:>14}", flush=True)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.platform(),
+                'results': results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}, run with --save to record one")
+        return 0
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
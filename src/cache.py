@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from .store import generator_version, load_mesh, save_mesh
+
+# Content-addressed result cache for the Output folder. Runs are keyed on the shape, parameters, output format and
+# generator version (store.generator_version()), so repeating a run, or a sweep that overlaps an earlier one, returns
+# the existing file instead of regenerating it. The generated mesh itself is also kept in the binary store, so asking
+# for the same geometry in another format skips the generation step and only exports.
+#
+# Layout, inside the output folder:
+#   .cache/entries/<key>.json   one record per cached item: files, their sizes/mtimes and the last time it was used
+#   .cache/meshes/<key>.mesh    stored meshes (see store.py)
+# Output files are tracked where they were written. Each record is its own small file, so parallel workers (cli.py)
+# never rewrite a shared index. When the tracked files exceed max_bytes, the least recently used items are deleted;
+# files the cache did not write itself are never touched.
+
+DEFAULT_MAX_BYTES = int(os.environ.get('UMBRELLA_CACHE_MAX_MB', 2048)) * 2**20
+
+
+def path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+class ResultCache:
+
+    def __init__(self, output_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.join(output_dir, '.cache')
+        self.entries_dir = os.path.join(self.root, 'entries')
+        self.meshes_dir = os.path.join(self.root, 'meshes')
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(**params):
+        params['generator_version'] = generator_version()
+        blob = json.dumps(params, sort_keys=True, default=repr)
+        return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+    def _entry_path(self, key):
+        return os.path.join(self.entries_dir, f"{key}.json")
+
+    def _read_entry(self, key):
+        try:
+            with open(self._entry_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, key, entry):
+        os.makedirs(self.entries_dir, exist_ok=True)
+        tmp_path = f"{self._entry_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._entry_path(key))
+
+    def _valid(self, entry):
+        # A hit needs every file to still be there, unchanged since it was recorded.
+        for path, size, mtime_ns in entry['files']:
+            try:
+                if os.stat(path).st_mtime_ns != mtime_ns or path_size(path) != size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def lookup(self, key):
+        # Returns the recorded paths on a hit (and marks the entry as used), None on a miss.
+        entry = self._read_entry(key)
+        if entry is None or not self._valid(entry):
+            return None
+        entry['last_used'] = time.time()
+        self._write_entry(key, entry)
+        return [path for path, _, _ in entry['files']]
+
+    def record(self, key, paths):
+        files = [[path, path_size(path), os.stat(path).st_mtime_ns] for path in paths]
+        self._write_entry(key, {'files': files, 'last_used': time.time()})
+        self.evict(keep=key)
+
+    def load_mesh(self, key):
+        if self.lookup(key) is None:
+            return None
+        nodes, elements, _, _ = load_mesh(os.path.join(self.meshes_dir, f"{key}.mesh"))
+        return nodes, elements
+
+    def store_mesh(self, key, nodes, elements, params):
+        path = save_mesh(os.path.join(self.meshes_dir, f"{key}.mesh"), nodes, elements, params)
+        self.record(key, [path])
+
+    def evict(self, keep=None):
+        try:
+            names = os.listdir(self.entries_dir)
+        except OSError:
+            return
+        entries = []
+        for name in names:
+            if name.endswith('.json'):
+                key = name[:-5]
+                entry = self._read_entry(key)
+                if entry is not None:
+                    entries.append((entry['last_used'], key, entry))
+
+        total = sum(size for _, _, entry in entries for _, size, _ in entry['files'])
+        for _, key, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for path, size, _ in entry['files']:
+                total -= size
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif os.path.exists(path):
+                    os.remove(path)
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
@@ -0,0 +1,139 @@
+import argparse
+import functools
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import profiling
+from .export import STRIP_EXPORTERS
+from .grading import parse_grading
+from .pipeline import FORMATS, GEOMETRIES, check_parameters, generate_and_export, stream_export
+from .quality import DEFAULT_THRESHOLDS, parse_thresholds
+
+# Headless entry point for batch and server use: no tkinter window and no plots. Every combination of the given
+# shapes, Ne, H, Re and N values is generated and exported in a process pool, using the same
+# {name}{Ne}_H{H}_R{Re}_N{N} filenames as the GUI. Variants whose output is already in the result cache (cache.py) are
+# not generated again, so re-running or extending a sweep only does the new work.
+#
+#   python -m src.cli --shapes hypar dome --Ne 6 8 12 --H 4:9:0.5 --Re 2 --N 20 --format s2k
+
+
+def parse_values(tokens, cast):
+    # Each token is a single value or an inclusive range start:stop[:step] (step defaults to 1).
+    values = []
+    for token in tokens:
+        if ':' not in token:
+            values.append(cast(token))
+            continue
+        parts = token.split(':')
+        if len(parts) not in (2, 3):
+            raise argparse.ArgumentTypeError(f"Invalid range '{token}', expected start:stop[:step]")
+        start, stop = cast(parts[0]), cast(parts[1])
+        step = cast(parts[2]) if len(parts) == 3 else cast(1)
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f"Invalid range '{token}', step must be positive")
+        if stop < start:
+            raise argparse.ArgumentTypeError(f"Invalid range '{token}', stop must not be below start")
+        count = int((stop - start)/step + 1e-9) + 1
+        # Rounded so that float steps give clean values (and filenames) such as 4.5 rather than 4.499999999999999.
+        values.extend(cast(round(start + k*step, 10)) for k in range(count))
+    return list(dict.fromkeys(values))
+
+
+def report_renumbering(label, stage):
+    # on_stage callback for the workers: only the bandwidth report is printed.
+    if stage.startswith('renumbered'):
+        print(f"{label}: {stage}", flush=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description='Generate umbrella tympan meshes without the GUI.')
+    parser.add_argument('--shapes', nargs='+', choices=list(GEOMETRIES), default=list(GEOMETRIES), help='Geometries to generate (default: all)')
+    parser.add_argument('--Ne', nargs='+', required=True, help='Number of sides, values or start:stop[:step] ranges')
+    parser.add_argument('--H', nargs='+', required=True, help='Length of apothem, values or ranges')
+    parser.add_argument('--Re', nargs='+', required=True, help='Rise of umbrella, values or ranges')
+    parser.add_argument('--N', nargs='+', required=True, help='Number of elements along apothem, values or ranges')
+    parser.add_argument('--format', choices=FORMATS, default='xlsx', help='Output format (default: xlsx); sym is the compressed full umbrella')
+    parser.add_argument('--full', action='store_true', help='Assemble the full umbrella instead of a single tympan')
+    parser.add_argument('--stream', action='store_true', help='Generate and write strip by strip to bound memory for very large N (not with --full)')
+    parser.add_argument('--output', default=os.path.join(os.getcwd(), 'Output'), help='Output folder (default: ./Output)')
+    parser.add_argument('--grading', default=None, help="Node spacing along the apothem: uniform (default), geometric:<ratio> or adaptive:<max chord deviation>, where N is the maximum")
+    parser.add_argument('--renumber', action='store_true', help='Renumber nodes to reduce the stiffness matrix bandwidth (Reverse Cuthill-McKee, not with --stream)')
+    parser.add_argument('--frames', action='store_true', help='Also export frame elements along the ribs and the outer edges (not with --stream)')
+    parser.add_argument('--quality', nargs='+', default=[], metavar='NAME=VALUE',
+                        help=f"Override mesh quality thresholds checked before export, not with --stream ({', '.join(f'{k}={v:g}' for k, v in DEFAULT_THRESHOLDS.items())})")
+    parser.add_argument('--no-quality-check', dest='check_quality', action='store_false', help='Export without validating the mesh first')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false', help='Regenerate every variant instead of reusing unchanged outputs and stored meshes')
+    parser.add_argument('--trace', nargs='?', const=profiling.DEFAULT_TRACE, default=None, metavar='PATH',
+                        help=f"Time every stage, print a summary and write a Chrome trace (default: {profiling.DEFAULT_TRACE})")
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        Ne_values = parse_values(args.Ne, int)
+        H_values = parse_values(args.H, float)
+        Re_values = parse_values(args.Re, float)
+        N_values = parse_values(args.N, int)
+        parse_grading(args.grading)
+        thresholds = parse_thresholds(args.quality)
+        check_parameters(min(Ne_values), min(H_values), min(N_values))
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        parser.error(str(e))
+    if args.stream and args.full:
+        parser.error('--stream writes single tympans and cannot be combined with --full')
+    if args.stream and args.format not in STRIP_EXPORTERS:
+        parser.error(f"--stream does not support the {args.format} format")
+    if args.stream and args.renumber:
+        parser.error('--renumber needs the whole mesh and cannot be combined with --stream')
+    if args.stream and args.frames:
+        parser.error('--frames needs the whole mesh and cannot be combined with --stream')
+    if args.format == 'sym' and (args.renumber or args.frames):
+        parser.error('the sym format stores the wedge once and cannot be combined with --renumber or --frames')
+    if args.stream and args.quality:
+        parser.error('--quality needs the whole mesh and cannot be combined with --stream, which is not validated')
+
+    jobs = list(itertools.product(args.shapes, Ne_values, H_values, Re_values, N_values))
+    print(f"{len(jobs)} variants -> {args.output}")
+
+    # With tracing on (--trace or UMBRELLA_TRACE), each job runs through profiling.run_traced() and its stage events
+    # are merged here, so the trace shows every worker process on its own row.
+    trace_path = args.trace or profiling.trace_path()
+    if trace_path:
+        profiling.enable(trace_path)
+
+    def submit(pool, func, *func_args):
+        if trace_path:
+            return pool.submit(profiling.run_traced, trace_path, func, *func_args)
+        return pool.submit(func, *func_args)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        if args.stream:
+            futures = {submit(pool, stream_export, shape, Ne, H, Re, N, args.output, args.format, None, args.use_cache, args.grading): (shape, Ne, H, Re, N)
+                       for shape, Ne, H, Re, N in jobs}
+        else:
+            futures = {submit(pool, generate_and_export, shape, Ne, H, Re, N, args.output, args.format, args.full, args.use_cache,
+                              functools.partial(report_renumbering, f"{shape} Ne={Ne} H={H} Re={Re} N={N}"), args.renumber, args.grading, args.frames,
+                              (thresholds or True) if args.check_quality else False): (shape, Ne, H, Re, N)
+                       for shape, Ne, H, Re, N in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                filepath = future.result()
+                if trace_path:
+                    filepath, events = filepath
+                    profiling.add_events(events)
+                print(f"[{done}/{len(jobs)}] {os.path.basename(filepath)}")
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(jobs)}] FAILED {futures[future]}: {e}", file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
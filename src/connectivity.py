@@ -0,0 +1,94 @@
+import numpy as np
+
+from .profiling import stage
+from .topology import ELEMENT_DTYPE
+
+# Mesh index built from the node/element arrays of hypar(), pyramid(), dome() or assemble(): node -> element adjacency
+# in CSR form, the unique edge list, and the classification of the edges into ribs, outer (free) edges and interior
+# edges, from which frame elements along the ribs and the edges are exported. Everything is sort based on the flat
+# connectivity (np.unique / argsort on one int64 key per edge or node reference), no Python loops over elements.
+#
+# Node ids are 1-based as in ele_ij, and the 0 in column 4 of triangles is skipped everywhere.
+
+EDGE_KINDS = ('interior', 'rib', 'outer')
+INTERIOR, RIB, OUTER = range(3)
+
+
+def node_elements(elements, n_nodes=None):
+    # CSR adjacency (indptr, rows): the elements using node k are elements[rows[indptr[k-1]:indptr[k]]], by row index
+    # and in increasing order.
+    conn = np.asarray(elements[:, 1:5], dtype=np.int64)
+    if n_nodes is None:
+        n_nodes = int(conn.max()) if conn.size else 0
+    node = conn.ravel()
+    row = np.repeat(np.arange(len(conn)), 4)
+    used = node > 0
+    node, row = node[used], row[used]
+
+    order = np.argsort(node, kind='stable')  # Stable, so rows stay increasing within a node
+    indptr = np.zeros(n_nodes+1, dtype=np.int64)
+    np.cumsum(np.bincount(node, minlength=n_nodes+1)[1:], out=indptr[1:])
+    return indptr, row[order]
+
+
+def element_edges(elements):
+    # Corner pairs (a, b) of every element in order around it, as two (E, 4) arrays: 1-2, 2-3, 3-4, 4-1 for quads and
+    # 1-2, 2-3, 3-1 for triangles, whose 4th pair is (0, 0).
+    conn = np.asarray(elements[:, 1:5], dtype=np.int64)
+    is_tri = conn[:, 3] == 0
+    nxt = np.roll(conn, -1, axis=1)
+    nxt[is_tri, 2] = conn[is_tri, 0]
+    nxt[is_tri, 3] = 0
+    return conn, nxt
+
+
+def edges(elements):
+    # Unique edges as (M, 2) node id pairs (lower id first, sorted) and the number of elements sharing each one:
+    # 1 on a free edge of the mesh, 2 inside it.
+    a, b = element_edges(elements)
+    used = b > 0
+    a, b = a[used], b[used]
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    scale = int(high.max()) + 1 if len(high) else 1
+    keys, counts = np.unique(low*scale + high, return_counts=True)
+    return np.column_stack((keys // scale, keys % scale)), counts
+
+
+def on_rib(x, y, Ne, tol):
+    # True for points on one of the Ne rib lines, the half-lines at angle (2k+1)*psi from the apex along which the
+    # tympans meet (the wedge of a single tympan spans -psi..psi).
+    psi = np.pi/Ne
+    angle = np.mod(np.arctan2(y, x) - psi, 2*psi)
+    angle = np.minimum(angle, 2*psi - angle)
+    return np.hypot(x, y)*np.sin(angle) <= tol
+
+
+def classify_edges(nodes, edge_nodes, counts, Ne, tol=None):
+    # EDGE_KINDS code per edge: RIB for edges along a rib line (free edges of a single tympan, interior edges of the
+    # assembled umbrella), OUTER for the remaining free edges and INTERIOR for the rest.
+    xy = nodes[:, 1:3]
+    if tol is None:
+        tol = 1e-6*max(float(np.abs(xy).max()) if len(xy) else 0.0, 1.0)
+
+    # Rib nodes are found once per node; only edges between two of them (a few per rib segment) need their midpoint
+    # checked, which rules out chords between different ribs through the apex region.
+    node_on_rib = on_rib(xy[:, 0], xy[:, 1], Ne, tol)
+    candidates = np.flatnonzero(node_on_rib[edge_nodes[:, 0] - 1] & node_on_rib[edge_nodes[:, 1] - 1])
+    mid = (xy[edge_nodes[candidates, 0] - 1] + xy[edge_nodes[candidates, 1] - 1])/2
+    rib = candidates[on_rib(mid[:, 0], mid[:, 1], Ne, tol)]
+
+    kinds = np.full(len(edge_nodes), INTERIOR, dtype=np.int8)
+    kinds[counts == 1] = OUTER
+    kinds[rib] = RIB
+    return kinds
+
+
+def frames(nodes, elements, Ne, kinds=('rib', 'outer')):
+    # Frame elements along the selected edge kinds as [Frame ID, NodeI, NodeJ] rows, int32 like ele_ij.
+    with stage('frames'):
+        edge_nodes, counts = edges(elements)
+        selected = np.isin(classify_edges(nodes, edge_nodes, counts, Ne), [EDGE_KINDS.index(kind) for kind in kinds])
+        frm_ij = np.empty((int(selected.sum()), 3), dtype=ELEMENT_DTYPE)
+        frm_ij[:, 0] = np.arange(1, len(frm_ij)+1)
+        frm_ij[:, 1:3] = edge_nodes[selected]
+    return frm_ij
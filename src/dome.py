@@ -1,80 +1,29 @@
 import numpy as np
 
+from .wedge import iter_wedge, wedge
+
 # Eliminated the hardcoded values because in umbrella.py, when the user hits Run, the values entered by the user is dynamically passed into the geometry functions.
 
-def dome(H, Re, Ne, N):
+def dome_surface(H, Re, Ne):
 
     psi = np.pi/Ne
 
     def get_z(x, y):
         return (Re * np.cos(psi)**2 / H**2) * (x**2 + y**2)
 
-    nodes_tot = (N+1)**2
-    x_base_i = np.linspace(0,H,N+1)
-    x_i = np.zeros(nodes_tot)
-    y_i = np.zeros(nodes_tot)
-    z_i = np.zeros(nodes_tot)
-    
-    #Defining x and y coords
-    n = 0
-    for col in range(N+1):
-        for i in range(N+1-col):
-            x_i[n] = x_base_i[i+col]
-            y_i[n] = x_base_i[col]*np.tan(psi)
-            n += 1
-    for col in range(N):
-        for i in range(N-col):
-            x_i[n] = x_base_i[i+1+col]
-            y_i[n] = -x_base_i[col+1]*np.tan(psi)
-            n += 1
-
-    #Defining z coords
-    for i in range(nodes_tot):
-        z_i[i] = get_z(x_i[i],y_i[i])
-
-    #Creating nodes array: [Node#, X, Y, Z]
-    nodes_ij = np.zeros((nodes_tot, 4))
-    for i in range(nodes_tot):
-        nodes_ij[i] = [i + 1, x_i[i], y_i[i], z_i[i]]
-
-    # Create element array
-    ele_tot = 2 * (N**2 + N) + 1
-    ele_ij = np.zeros((ele_tot,5))
-    ele = 1
-
-    # When i == 0, we build triangle elements, otherwise we build quadrilaterals using four nodes.
-    for col in range(N):
-        for i in range(N-col):
-            ele_ij[ele-1][0] = ele
-            if i == 0:
-                ele_ij[ele-1][1] = ele + col
-                ele_ij[ele-1][2] = ele_ij[ele-1][1] + (N+1) - col
-                ele_ij[ele-1][3] = ele_ij[ele-1][1] + 1
-            else:
-                ele_ij[ele-1][1] = ele + col
-                ele_ij[ele-1][2] = ele_ij[ele-1][1] + N - col
-                ele_ij[ele-1][3] = ele_ij[ele-1][2] + 1
-                ele_ij[ele-1][4] = ele_ij[ele-1][1] + 1
-            ele += 1
-
-    for col in range(N):
-        for i in range(N - col):
-            ele_ij[ele - 1][0] = ele
-            if i == 0:  # Triangle
-                ele_ij[ele - 1][1] = ele + (N + 1)
-                ele_ij[ele - 1][2] = 1 if col == 0 else ele + col
-                ele_ij[ele - 1][3] = ele_ij[ele - 1][2] + 1
-            else:  # Quadrilateral
-                ele_ij[ele - 1][1] = ele + N
-                ele_ij[ele - 1][2] = i + 1 if col == 0 else ele + col
-                ele_ij[ele - 1][3] = ele_ij[ele - 1][2] + 1
-                ele_ij[ele - 1][4] = ele + (N + 1)
-            ele += 1
-
-    # Safety check: Make sure we didn't exceed the allocated size. This is critical as it confirms that the number of elements you're assigning does not exceed the space you allocated for them.
-    assert ele <= ele_tot, f"Too many elements generated: {ele} > {ele_tot}"
-
-    return nodes_ij, ele_ij
+    return get_z
+
+
+def dome(H, Re, Ne, N, stations=None):
+
+    # Node layout and element connectivity come from the shared wedge grid (wedge.py). The element array is sized exactly (N**2 + N rows), so the old over-allocation and its trailing zero rows are gone along with the assert that guarded it.
+    return wedge(H, Ne, N, dome_surface(H, Re, Ne), stations)
+
+
+def iter_dome(H, Re, Ne, N, strip=None, stations=None):
+
+    # Streaming dome(): (node_strips, element_strips) generators, see iter_wedge() in wedge.py.
+    return iter_wedge(H, Ne, N, dome_surface(H, Re, Ne), strip, stations)
 
 
 
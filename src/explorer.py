@@ -0,0 +1,124 @@
+import time
+from tkinter import BOTH, HORIZONTAL, LEFT, W, X, Button, Checkbutton, DoubleVar, Frame, IntVar, Label, Radiobutton, \
+    Scale, StringVar, Toplevel
+
+from .assembly import assemble
+from .parametric import ParametricGeometry
+from .pipeline import GEOMETRIES
+from .preview import MAX_FACES, MeshPreview, preview_N
+
+# Interactive exploration window: sliders for Ne, H, Re and N redraw the preview as they move, without generating the
+# full mesh or writing anything; Export hands the current parameters to the normal run (workers, cache, chosen format).
+#
+# Slider events are debounced: every change restarts a DEBOUNCE_MS timer with after(), and only the last value of a
+# drag is drawn. A redraw reuses as much as it can:
+#   - geometry comes from a ParametricGeometry per shape, so H/Re/Ne changes rescale its normalized arrays in place
+#     (parametric.py) and only a change of the preview's level of detail rebuilds it
+#   - N above the level of detail cap (preview_N) does not change the previewed mesh at all, so nothing is recomputed
+#   - the MeshPreview updates the vertices of its existing Poly3DCollection instead of creating new artists
+
+DEBOUNCE_MS = 150
+
+# Slider name -> (from, to, resolution)
+SLIDERS = {
+    'Ne': (3, 24, 1),
+    'H': (0.5, 20.0, 0.1),
+    'Re': (0.0, 10.0, 0.1),
+    'N': (1, 400, 1),
+}
+
+
+class PreviewGeometry:
+
+    # The Tk-free part of the explorer: the preview mesh for a set of parameters, reusing one ParametricGeometry per
+    # shape while its level of detail stays the same.
+    def __init__(self, max_faces=MAX_FACES):
+        self.max_faces = max_faces
+        self._geometries = {}
+        self._last = None
+
+    def level_of_detail(self, N, Ne, full=False):
+        return preview_N(N, Ne if full else 1, self.max_faces)
+
+    def mesh(self, shape, H, Re, Ne, N, full=False):
+        # (nodes, elements), or None when the previewed mesh would be the same as the last one returned.
+        N_lod = self.level_of_detail(N, Ne, full)
+        key = (shape, H, Re, Ne, N_lod, full)
+        if key == self._last:
+            return None
+        geometry = self._geometries.get(shape)
+        if geometry is None or geometry.N != N_lod:
+            geometry = self._geometries[shape] = ParametricGeometry(shape, N_lod)
+        nodes, elements = geometry.evaluate(H, Re, Ne)
+        if full:
+            nodes, elements = assemble(nodes, elements, Ne)
+        self._last = key
+        return nodes, elements
+
+
+class ParameterExplorer:
+
+    # on_export(shape, Ne, H, Re, N, full) is called by the Export button.
+    def __init__(self, master, on_export, shape='hypar', Ne=6, H=4.0, Re=1.0, N=20, full=False, debounce_ms=DEBOUNCE_MS):
+        self.on_export = on_export
+        self.debounce_ms = debounce_ms
+        self.geometry = PreviewGeometry()
+        self._pending = None
+
+        self.window = Toplevel(master)
+        self.window.title('Explore parameters')
+        controls = Frame(self.window)
+        controls.pack(side=LEFT, fill=BOTH, padx=5, pady=5)
+
+        self.shape = StringVar(value=shape)
+        for key, (name, _) in GEOMETRIES.items():
+            Radiobutton(controls, text=name, value=key, variable=self.shape, command=self.schedule).pack(anchor=W)
+        self.full = IntVar(value=int(full))
+        Checkbutton(controls, text='Full umbrella', variable=self.full, command=self.schedule).pack(anchor=W)
+
+        self.values = {}
+        initial = {'Ne': Ne, 'H': H, 'Re': Re, 'N': N}
+        for name, (low, high, resolution) in SLIDERS.items():
+            var = IntVar(value=int(initial[name])) if resolution == 1 else DoubleVar(value=float(initial[name]))
+            self.values[name] = var
+            Scale(controls, label=name, from_=low, to=high, resolution=resolution, orient=HORIZONTAL, length=220,
+                  variable=var, command=lambda _: self.schedule()).pack(fill=X)
+
+        Button(controls, text='Export', width=15, command=self.export).pack(pady=5)
+        self.status = StringVar(value='')
+        Label(controls, textvariable=self.status, wraplength=220, justify=LEFT).pack(anchor=W)
+
+        self.preview = MeshPreview(self.window)
+        self.preview.widget.pack(side=LEFT, fill=BOTH, expand=True)
+        self.redraw()
+
+    def parameters(self):
+        # (shape, Ne, H, Re, N, full) as currently set.
+        v = self.values
+        return self.shape.get(), v['Ne'].get(), v['H'].get(), v['Re'].get(), v['N'].get(), bool(self.full.get())
+
+    def schedule(self):
+        # Restart the debounce timer; only the last change of a drag gets drawn.
+        if self._pending is not None:
+            self.window.after_cancel(self._pending)
+        self._pending = self.window.after(self.debounce_ms, self.redraw)
+
+    def redraw(self):
+        self._pending = None
+        shape, Ne, H, Re, N, full = self.parameters()
+        N_lod = self.geometry.level_of_detail(N, Ne, full)
+        name = f"{GEOMETRIES[shape][0]}Full" if full else GEOMETRIES[shape][0]
+        title = name if N_lod == N else f"{name} (preview at N={N_lod})"
+        t0 = time.perf_counter()
+        result = self.geometry.mesh(shape, H, Re, Ne, N, full)
+        if result is None:
+            # Same previewed mesh (N moved above the level of detail cap): only the title can change.
+            self.preview.ax.set_title(title)
+            self.preview.canvas.draw_idle()
+            return
+        nodes, elements = result
+        self.preview.show_mesh(nodes, elements, title)
+        self.status.set(f"Ne={Ne} H={H:g} Re={Re:g} N={N}: {len(elements)} faces in {(time.perf_counter() - t0)*1000:.0f} ms")
+
+    def export(self):
+        self.on_export(*self.parameters())
@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+
+from .store import save_mesh
+
+# Exporters for the node/element arrays returned by hypar(), pyramid() and dome(). Kept out of umbrella.py so the GUI,
+# scripts and batch runs all write the same files.
+
+# Excel's hard limit; xlsxwriter silently drops anything past it, so large meshes are rejected up front instead.
+XLSX_MAX_ROWS = 1048576
+
+# Rows converted to Python numbers per block. Bounds the temporary lists while keeping conversion in bulk.
+CHUNK_ROWS = 65536
+
+
+def _blocks(strips):
+    # Split a stream of row blocks (whole arrays or generator strips) into pieces of at most CHUNK_ROWS rows.
+    for strip in strips:
+        for start in range(0, len(strip), CHUNK_ROWS):
+            yield strip[start:start+CHUNK_ROWS]
+
+
+def _check_rows(rows, what):
+    if rows > XLSX_MAX_ROWS:
+        raise ValueError(f"Mesh has more than {XLSX_MAX_ROWS} {what}, more than the rows an Excel sheet can hold.")
+
+
+def write_xlsx(filepath, nodes, elements, frames=None):
+
+    if len(nodes) > XLSX_MAX_ROWS or len(elements) > XLSX_MAX_ROWS:
+        raise ValueError(f"Mesh has {len(nodes)} nodes and {len(elements)} elements, more than the {XLSX_MAX_ROWS} rows an Excel sheet can hold.")
+    write_xlsx_strips(filepath, [nodes], [elements], frames)
+
+
+def write_xlsx_strips(filepath, node_strips, element_strips, frames=None):
+
+    # Takes any iterables of node and element row blocks, e.g. the strip generators of iter_hypar()/iter_pyramid()/
+    # iter_dome(), and writes each block as it arrives. frames ([Frame ID, NodeI, NodeJ] rows, see connectivity.py)
+    # go to a third Frames tab when given.
+    import xlsxwriter  # Imported on first use so that loading this module (e.g. at GUI start-up) stays cheap
+
+    # constant_memory streams each finished row to a temporary file instead of keeping the whole workbook in memory;
+    # rows must then be written in order, which is how both sheets are filled below.
+    wb = xlsxwriter.Workbook(filepath, {'constant_memory': True})
+    try:
+        # SAP2000 layout for the Nodes tab: Node# in A, X in D, Y in E, Z in G.
+        ws_nodes = wb.add_worksheet('Nodes')
+        start = 0
+        for block in _blocks(node_strips):
+            _check_rows(start + len(block), 'nodes')
+            ids = block[:, 0].astype(np.int64).tolist()
+            for i, (node_id, (x, y, z)) in enumerate(zip(ids, block[:, 1:4].tolist()), start):
+                ws_nodes.write_number(i, 0, node_id)
+                ws_nodes.write_row(i, 3, (x, y))
+                ws_nodes.write_number(i, 6, z)
+            start += len(block)
+
+        # Elements tab: [Element ID, Node1, Node2, Node3, Node4]. Triangles carry a 0 as 4th node, which is left blank.
+        ws_elements = wb.add_worksheet('Elements')
+        start = 0
+        for block in _blocks(element_strips):
+            _check_rows(start + len(block), 'elements')
+            for i, row in enumerate(block.astype(np.int64).tolist(), start):
+                ws_elements.write_row(i, 0, row if row[-1] else row[:-1])
+            start += len(block)
+
+        if frames is not None:
+            ws_frames = wb.add_worksheet('Frames')
+            start = 0
+            for block in _blocks([frames]):
+                _check_rows(start + len(block), 'frames')
+                for i, row in enumerate(block.astype(np.int64).tolist(), start):
+                    ws_frames.write_row(i, 0, row)
+                start += len(block)
+    except ValueError:
+        wb.close()
+        os.remove(filepath)  # Do not leave a truncated workbook behind
+        raise
+
+    wb.close()
+
+
+# ---------------- Text exporters ---------------- #
+# Text output is formatted a block of rows at a time: one "%" operation renders a whole block from a flat list of
+# values, and the file object buffers the writes. No per-row Python string building.
+
+FLOAT_FMT = '%.15g'
+
+
+def _write_block(f, fmt, block):
+    for chunk in _blocks([block]):
+        f.write((fmt*len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def _write_elements(f, elements, tri_fmt, quad_fmt):
+    # Triangles (4th node 0) and quads need different line formats, so the element array is written as runs of one
+    # kind; the generators produce long runs (one triangle per column), which keeps the number of blocks small.
+    conn = elements.astype(np.int64)
+    is_tri = conn[:, 4] == 0
+    bounds = np.flatnonzero(np.diff(is_tri.astype(np.int8))) + 1
+    for run in np.split(np.arange(len(conn)), bounds):
+        if run.size == 0:
+            continue
+        if is_tri[run[0]]:
+            _write_block(f, tri_fmt, conn[run, :4])
+        else:
+            _write_block(f, quad_fmt, conn[run])
+
+
+def write_s2k(filepath, nodes, elements, frames=None):
+
+    write_s2k_strips(filepath, [nodes], [elements], frames)
+
+
+def write_s2k_strips(filepath, node_strips, element_strips, frames=None):
+
+    # SAP2000 text input: a JOINT COORDINATES table and a CONNECTIVITY - AREA table, which SAP2000 imports directly
+    # through File > Import > SAP2000 .s2k, without the Excel interop. frames add a CONNECTIVITY - FRAME table.
+    joint_fmt = ('   Joint=%d   CoordSys=GLOBAL   CoordType=Cartesian   XorR={0}   Y={0}   Z={0}   SpecialJt=No'
+                 '   GlobalX={0}   GlobalY={0}   GlobalZ={0}\n').format(FLOAT_FMT)
+    tri_fmt = '   Area=%d   NumJoints=3   Joint1=%d   Joint2=%d   Joint3=%d\n'
+    quad_fmt = '   Area=%d   NumJoints=4   Joint1=%d   Joint2=%d   Joint3=%d   Joint4=%d\n'
+
+    with open(filepath, 'w', buffering=1 << 20) as f:
+        f.write('TABLE:  "JOINT COORDINATES"\n')
+        for nodes in node_strips:
+            _write_block(f, joint_fmt, np.column_stack((nodes[:, 0], nodes[:, 1:4], nodes[:, 1:4])))
+        f.write('\nTABLE:  "CONNECTIVITY - AREA"\n')
+        for elements in element_strips:
+            _write_elements(f, elements, tri_fmt, quad_fmt)
+        if frames is not None:
+            f.write('\nTABLE:  "CONNECTIVITY - FRAME"\n')
+            _write_block(f, '   Frame=%d   JointI=%d   JointJ=%d   IsCurved=No\n', frames.astype(np.int64))
+        f.write('\nEND TABLE DATA\n')
+
+
+def write_csv(filepath, nodes, elements, frames=None):
+
+    write_csv_strips(filepath, [nodes], [elements], frames)
+
+
+def write_csv_strips(filepath, node_strips, element_strips, frames=None):
+
+    # Plain CSV, one file per table next to each other: <name>_Nodes.csv and <name>_Elements.csv, plus
+    # <name>_Frames.csv with frames. Triangles leave the Node4 field empty.
+    nodes_path, elements_path = output_paths(filepath)[:2]
+
+    with open(nodes_path, 'w', newline='', buffering=1 << 20) as f:
+        f.write('Node,X,Y,Z\n')
+        for nodes in node_strips:
+            _write_block(f, '%d,{0},{0},{0}\n'.format(FLOAT_FMT), nodes[:, :4])
+
+    with open(elements_path, 'w', newline='', buffering=1 << 20) as f:
+        f.write('Element,Node1,Node2,Node3,Node4\n')
+        for elements in element_strips:
+            _write_elements(f, elements, '%d,%d,%d,%d,\n', '%d,%d,%d,%d,%d\n')
+
+    if frames is not None:
+        with open(output_paths(filepath, frames=True)[2], 'w', newline='', buffering=1 << 20) as f:
+            f.write('Frame,NodeI,NodeJ\n')
+            _write_block(f, '%d,%d,%d\n', frames.astype(np.int64))
+
+
+def output_paths(filepath, frames=False):
+    # Files actually written for an output filepath: the CSV exporter splits it into two tables (three with frames),
+    # the others write the file (or, for 'mesh', the folder) itself.
+    stem, ext = os.path.splitext(filepath)
+    if ext == '.csv':
+        return [f"{stem}_Nodes.csv", f"{stem}_Elements.csv"] + ([f"{stem}_Frames.csv"] if frames else [])
+    return [filepath]
+
+
+# Output formats selectable from the GUI, keyed by file extension. 'mesh' is the binary store (store.py), a folder of
+# .npy files that can be reopened memory-mapped.
+EXPORTERS = {
+    'xlsx': write_xlsx,
+    's2k': write_s2k,
+    'csv': write_csv,
+    'mesh': save_mesh,
+}
+
+# The same formats written from strip generators (see stream.py).
+STRIP_EXPORTERS = {
+    'xlsx': write_xlsx_strips,
+    's2k': write_s2k_strips,
+    'csv': write_csv_strips,
+}
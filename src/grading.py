@@ -0,0 +1,122 @@
+import numpy as np
+
+from .dome import dome_surface
+from .hypar import hypar_surface
+from .pyramid import pyramid_surface
+from .wedge import wedge_surface
+
+# Graded node spacing along the apothem. Every generator lays its grid out on N+1 stations t in [0, 1] (the grid lines
+# across the apothem, np.linspace(0, 1, N+1) by default) and accepts them as `stations`; the connectivity does not
+# change, only where the grid lines sit. Two gradings are provided:
+#   geometric  the intervals grow geometrically from the apex so the last one is `ratio` times the first, whatever N
+#              is, so ratio > 1 refines towards the apex and < 1 towards the outer edge. The ratio is the overall one
+#              rather than the step between neighbours, which would compound to ratio**(N-1) and give fine meshes
+#              elements far beyond the quality check's aspect limit (quality.py)
+#   adaptive   intervals are sized by the local curvature so no element deviates more than `tol` (a length, in the
+#              units of H and Re) from the true surface, using as few intervals as that needs and at most N. The three
+#              surfaces have about the same curvature everywhere on the grid, so in practice this gives uniform spacing
+#              and what it chooses is N
+# A grading is given as a spec string, 'uniform', 'geometric:<ratio>' or 'adaptive:<tol>', which is what the command
+# line takes and what goes into the cache key and the output filename.
+
+GRADINGS = ('uniform', 'geometric', 'adaptive')
+
+
+def parse_grading(spec):
+    # Returns (kind, value); value is None for 'uniform'.
+    kind, _, value = (spec or 'uniform').partition(':')
+    if kind not in GRADINGS:
+        raise ValueError(f"Unknown grading '{kind}', expected one of {', '.join(GRADINGS)}")
+    if kind == 'uniform':
+        return kind, None
+    try:
+        value = float(value)
+    except ValueError:
+        raise ValueError(f"Grading '{spec}' needs a number, e.g. {kind}:{'4' if kind == 'geometric' else '0.001'}")
+    if value <= 0:
+        raise ValueError(f"Grading '{spec}' needs a positive value")
+    return kind, value
+
+
+def geometric_stations(N, ratio):
+    # ratio is last interval / first interval; neighbouring intervals differ by ratio**(1/(N-1)).
+    if ratio == 1 or N == 1:
+        return np.linspace(0, 1, N+1)
+    t = np.cumsum(np.concatenate(([0.0], ratio**(np.arange(N)/(N - 1)))))
+    t /= t[-1]
+    t[-1] = 1.0
+    return t
+
+
+def unit_surface(shape, H, Re, Ne):
+    # z(t, w) over the grid's parameter space: apothem fraction t, transverse position w in [0, t].
+    if shape == 'hypar':
+        return hypar_surface(H, Re, Ne)
+    get_z = {'pyramid': pyramid_surface, 'dome': dome_surface}[shape](H, Re, Ne)
+    return wedge_surface(H, Ne, get_z)
+
+
+def interval_deviation(surface, t):
+    # Largest chord deviation of the elements touching each of the len(t)-1 intervals. The grid cell between stations
+    # c-1, c and transverse lines m, m+1 has corners (t[c-1], t[m]), (t[c], t[m]), (t[c], t[m+1]), (t[c-1], t[m+1]),
+    # or only the first three on the diagonal (m == c-1), where it is a triangle. Its deviation is the distance in z
+    # between the surface and the flat element at the centroid. Interval j is used both along the apothem (c-1 == j)
+    # and across it (m == j), so it takes the worst cell of either kind.
+    n = len(t) - 1
+    row, m = np.tril_indices(n)  # row = c-1 in 0..n-1, m in 0..row
+    quad = m < row
+    t0, t1 = t[row], t[row+1]
+    w0, w1 = t[m], t[m+1]
+
+    z0 = surface(t0, np.minimum(w0, t0))
+    z1 = surface(t1, w0)
+    z2 = surface(t1, w1)
+    z3 = surface(t0, np.minimum(w1, t0))  # Only used by quads, where w1 <= t0
+
+    z_mean = np.where(quad, (z0 + z1 + z2 + z3)/4, (z0 + z1 + z2)/3)
+    t_mid = np.where(quad, (t0 + t1)/2, (t0 + 2*t1)/3)
+    w_mid = np.where(quad, (w0 + w1)/2, (2*w0 + w1)/3)
+    dev = np.abs(surface(t_mid, w_mid) - z_mean)
+
+    worst = np.zeros(n)
+    np.maximum.at(worst, row, dev)
+    np.maximum.at(worst, m, dev)
+    return worst
+
+
+def adaptive_stations(surface, tol, N_max, samples=256):
+    # The deviation of an element is about (local curvature)*h^2, so on a fine uniform grid dev/h^2 gives the local
+    # coefficient, and spacing the stations evenly in the integral of sqrt(coefficient) makes every element deviate
+    # about equally; the number of intervals follows from tol. If the result still exceeds tol (the estimate ignores
+    # how neighbouring intervals interact), the count is raised until it does not, up to N_max.
+    fine = np.linspace(0, 1, samples+1)
+    density = np.sqrt(interval_deviation(surface, fine))*samples  # sqrt(dev/h^2)
+    cdf = np.concatenate(([0.0], np.cumsum(density)/samples))
+    if cdf[-1] == 0:
+        return np.array([0.0, 1.0])  # Flat surface: one interval is exact
+
+    N = int(np.ceil(cdf[-1]/np.sqrt(tol)))
+    while True:
+        N = min(max(N, 1), N_max)
+        t = np.interp(np.linspace(0, cdf[-1], N+1), cdf, fine)
+        t[0], t[-1] = 0.0, 1.0
+        if N == N_max or interval_deviation(surface, t).max() <= tol:
+            return t
+        N = int(np.ceil(N*1.1))
+
+
+def stations(spec, shape, H, Re, Ne, N):
+    # Stations for a grading spec, or None for uniform spacing (the generators' own exact linspace). For 'adaptive',
+    # N is the maximum number of intervals and the result may have fewer.
+    kind, value = parse_grading(spec)
+    if kind == 'uniform':
+        return None
+    if kind == 'geometric':
+        return geometric_stations(N, value)
+    return adaptive_stations(unit_surface(shape, H, Re, Ne), value, N)
+
+
+def max_deviation(shape, H, Re, Ne, N, t=None):
+    # Worst element chord deviation of a grid, for comparing gradings (uniform when t is None).
+    t = np.linspace(0, 1, N+1) if t is None else t
+    return float(interval_deviation(unit_surface(shape, H, Re, Ne), t).max())
@@ -1,8 +1,23 @@
 import numpy as np
 
+from .profiling import stage
+from .stream import strip_ranges
+from .topology import ELEMENT_DTYPE, topology_cache
+
 # Eliminated the hardcoded values because in umbrella.py, when the user hits Run, the values entered by the user is dynamically passed into the geometry functions.
 
-def hypar(H, Re, Ne, N):
+def hypar(H, Re, Ne, N, stations=None):
+
+    nod_ij = hypar_nodes(H, Re, Ne, N, stations=stations)
+
+    # Connectivity only depends on N, so it comes from the shared topology cache (read-only) instead of being rebuilt.
+    ele_ij = topology_cache.get('hypar', N, hypar_elements)
+
+    # nod_ij and ele_ij are now exported using umbrella.py keeping hypar.py focused purely on geometry logic. worksheet.write() was removed as it is hardcoded and should be dynamic.
+    return nod_ij, ele_ij
+
+
+def hypar_functions(H, Re, Ne):
 
     psi = np.pi/Ne
 
@@ -37,68 +52,106 @@ def hypar(H, Re, Ne, N):
         yr = x*np.sin(theta*n) + y*np.cos(theta*n)
         return xr, yr
 
-    # -- Geometry generation --
-    xp_base_i = np.linspace(0,H,N+1)
-    xp_index_original = np.linspace(0,N,N+1)
-    xp_index_i = np.linspace(0,N,N+1)
-    nodes_tot = int((N+1)**2)
-    xp_i = np.zeros(nodes_tot)
-    index_i = np.zeros(nodes_tot)
-    n = 0
-
-    for col in range(N+1):
-        for i in range(col+1):
-            xp_base_i[i] = xp_base_i[int(xp_index_i[col])]
-            xp_index_i[i] = int(col)
-        for s in range(N+1):
-            xp_i[n] = xp_base_i[s]
-            index_i[n] = xp_index_i[s]
-            n += 1
-
-    yp_i = np.zeros(nodes_tot)
-    n = 0
-    for col in range(N+1):
-        for i in range(N+1):
-            index = min(i, col)
-            yp_i[n] = np.linspace(0,get_K(xp_i[n]),int(index_i[n]+1))[int(index)]
-            n += 1
-
-    # List comprehensions are often more readable and slightly faster than basic for loops.
-    z_i = np.array([get_z(xp_i[i], yp_i[i]) for i in range(nodes_tot)])
-
-    # This part separates the steps, compute xp_i and yp_i arrays for raw coordinates, then call get_xy() and get_z() to get actual x, y, z for each node then create a clean nodes_ij array.
-    nodes_ij = np.array([get_xy(xp_i[i], yp_i[i]) + (get_z(xp_i[i], yp_i[i]),) for i in range(nodes_tot)]).T
-
-    # Here we kept sym() for mirroring, rotate() for final orientation and nodes_mod_ij for intermediate transformation steps but now it is all separated from drawing/export logic making it more modular.
-    nodes_mod_ij = np.copy(nodes_ij)
-    for col in range(N + 1):
-        for i in range(N + 1):
-            if i < col:
-                index = int(i + (N + 1) * col)
-                xyr = sym(nodes_ij[0][index], nodes_ij[1][index])
-                nodes_mod_ij[0][index] = xyr[0]
-                nodes_mod_ij[1][index] = xyr[1]
-
-    nodes_rot_ij = np.zeros((3, nodes_tot))
-    for i in range(nodes_tot):
-        x, y = rotate(nodes_mod_ij[0][i], nodes_mod_ij[1][i], -psi, 1)
-        nodes_rot_ij[:, i] = [x, y, nodes_mod_ij[2][i]]
-
-    ele_num = int(N ** 2)
-    ele_ij = np.zeros((ele_num, 5))
-    n = 0
-    for col in range(N):
-        for row in range(N):
-            base = int(col + 1 + (N) * col + row)
-            ele_ij[n] = [n + 1, base, base + N + 1, base + N + 2, base + 1]
-            n += 1
-
-    nod_ij = np.zeros((nodes_tot, 4))
-    for n in range(nodes_tot):
-        nod_ij[n] = [n + 1, nodes_rot_ij[0][n], nodes_rot_ij[1][n], nodes_rot_ij[2][n]]
+    return get_z, get_K, get_xy, sym, rotate
 
-    # nod_ij and ele_ij are now exported using umbrella.py keeping hypar.py focused purely on geometry logic. worksheet.write() was removed as it is hardcoded and should be dynamic.
-    return nod_ij, ele_ij
+
+def hypar_surface(H, Re, Ne):
+
+    # z at apothem fraction t in [0, 1] and transverse position w in [0, t], i.e. w/t of the way along the transverse
+    # line at that station. This is the parameter space the node grid is laid out in (see grading.py).
+    get_z, get_K = hypar_functions(H, Re, Ne)[:2]
+
+    def z(t, w):
+        xp = t*H
+        v = np.divide(w, t, out=np.zeros(np.broadcast(t, w).shape), where=t > 0)
+        return get_z(xp, v*get_K(xp))
+
+    return z
+
+
+def hypar_nodes(H, Re, Ne, N, start=0, stop=None, stations=None):
+
+    # Nodes of columns start..stop-1 (all of them by default); each column holds N+1 nodes. stations are the N+1
+    # apothem fractions of the grid lines (see grading.py), uniform np.linspace(0, 1, N+1) by default.
+    if stop is None:
+        stop = N+1
+    psi = np.pi/Ne
+    get_z, get_K, get_xy, sym, rotate = hypar_functions(H, Re, Ne)
+
+    # -- Geometry generation --
+    # The whole (N+1)^2 grid is built with array broadcasting instead of nested loops. Node n = col*(N+1) + s sits at
+    # station max(s, col) along the apothem and at position min(s, col) along that station's transverse line, which is
+    # exactly what the old xp_base_i/xp_index_i bookkeeping loop and the per-node np.linspace(0, K, index+1) produced.
+    nodes_tot = int((stop - start)*(N+1))
+    col = np.arange(start, stop)[:, None]
+    s = np.arange(N+1)[None, :]
+    with stage('hypar.grid'):
+        index_i = np.maximum(s, col).ravel()
+        xp_base_i = np.linspace(0,H,N+1) if stations is None else H*np.asarray(stations)
+        xp_i = xp_base_i[index_i]
+
+        # K only depends on the station, so it is evaluated N+1 times and gathered. np.linspace(0, K, index+1)[m] is
+        # m*(K/index) with the last point pinned to K, and a single point (index == 0) at 0.
+        K_i = get_K(xp_base_i)[index_i]
+        m_i = np.minimum(s, col).ravel()
+        if stations is None:
+            step_i = np.divide(K_i, index_i, out=np.zeros(nodes_tot), where=index_i > 0)
+            yp_i = np.where(m_i == index_i, np.where(index_i > 0, K_i, 0.0), m_i*step_i)
+        else:
+            # Graded: the transverse line at a station is divided like the apothem up to that station.
+            t = np.asarray(stations)
+            yp_i = K_i*np.divide(t[m_i], t[index_i], out=np.zeros(nodes_tot), where=index_i > 0)
+
+        x_i, y_i = get_xy(xp_i, yp_i)
+
+    with stage('hypar.z'):
+        z_i = get_z(xp_i, yp_i)
+
+    # sym() mirrors the nodes below the diagonal (i < col) in one masked pass, then rotate() orients the whole tympan.
+    with stage('hypar.sym'):
+        mirror = (s < col).ravel()
+        x_i[mirror], y_i[mirror] = sym(x_i[mirror], y_i[mirror])
+    with stage('hypar.rotate'):
+        x_i, y_i = rotate(x_i, y_i, -psi, 1)
+
+    nod_ij = np.empty((nodes_tot, 4))
+    nod_ij[:, 0] = np.arange(start*(N+1)+1, stop*(N+1)+1)
+    nod_ij[:, 1] = x_i
+    nod_ij[:, 2] = y_i
+    nod_ij[:, 3] = z_i
+    return nod_ij
+
+
+def hypar_elements(N, start=0, stop=None):
+
+    # Elements of columns start..stop-1 (all of them by default), N per column.
+    if stop is None:
+        stop = N
+    # Element n spans columns col and col+1 at row offset row; base is the 1-based id of its first node.
+    ele_num = int((stop - start)*N)
+    base = (np.arange(start, stop)[:, None]*(N+1) + np.arange(N)[None, :] + 1).ravel()
+    ele_ij = np.empty((ele_num, 5), dtype=ELEMENT_DTYPE)
+    ele_ij[:, 0] = np.arange(start*N+1, stop*N+1)
+    ele_ij[:, 1] = base
+    ele_ij[:, 2] = base + N + 1
+    ele_ij[:, 3] = base + N + 2
+    ele_ij[:, 4] = base + 1
+    return ele_ij
+
+
+def iter_hypar(H, Re, Ne, N, strip=None, stations=None):
+
+    # Streaming hypar(): returns (node_strips, element_strips), two generators yielding blocks of whole columns of
+    # nod_ij and ele_ij rows in order. Nothing is computed until they are consumed.
+    def node_strips():
+        for start, stop in strip_ranges(N+1, N+1, strip):
+            yield hypar_nodes(H, Re, Ne, N, start, stop, stations)
+
+    def element_strips():
+        for start, stop in strip_ranges(N, N, strip):
+            yield hypar_elements(N, start, stop)
+
+    return node_strips(), element_strips()
 
 
 
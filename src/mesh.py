@@ -0,0 +1,64 @@
+import numpy as np
+
+# Compact mesh container. The generators, assemble() and renumber() return float64 nod_ij [Node#, X, Y, Z] and int32
+# ele_ij [Element ID, Node1..Node4] arrays (topology.ELEMENT_DTYPE), with node ids repeated as floats and triangles
+# padded to four nodes with a 0. A Mesh keeps the same data with
+#   coords           (n, 3) float64 or float32, node k is coords[k-1], so node ids are implicit
+#   tri_ids, tris    int32 element ids and (nt, 3) 1-based node ids of the triangles
+#   quad_ids, quads  int32 element ids and (nq, 4) 1-based node ids of the quadrilaterals
+# which is about 85% of the memory of those arrays (about 60% with float32 coordinates). from_arrays() and
+# to_arrays() convert between the two, so code that expects the original arrays keeps working. The mesh service
+# (service.py) sends meshes in this form, with the slot names as the .npz array names.
+
+
+class Mesh:
+
+    __slots__ = ('coords', 'tri_ids', 'tris', 'quad_ids', 'quads')
+
+    def __init__(self, coords, tri_ids, tris, quad_ids, quads):
+        self.coords = coords
+        self.tri_ids = tri_ids
+        self.tris = tris
+        self.quad_ids = quad_ids
+        self.quads = quads
+
+    @classmethod
+    def from_arrays(cls, nodes, elements, dtype=np.float64):
+        coords = np.ascontiguousarray(nodes[:, 1:4], dtype=dtype)
+        conn = elements.astype(np.int32)
+        is_tri = conn[:, 4] == 0
+        return cls(coords,
+                   np.ascontiguousarray(conn[is_tri, 0]), np.ascontiguousarray(conn[is_tri, 1:4]),
+                   np.ascontiguousarray(conn[~is_tri, 0]), np.ascontiguousarray(conn[~is_tri, 1:5]))
+
+    def to_arrays(self):
+        nodes = np.empty((self.n_nodes, 4))
+        nodes[:, 0] = np.arange(1, self.n_nodes+1)
+        nodes[:, 1:4] = self.coords
+
+        # Rows are placed by element id, so the original element order is restored.
+        elements = np.zeros((self.n_elements, 5), dtype=self.tris.dtype)
+        elements[self.tri_ids - 1, 0] = self.tri_ids
+        elements[self.tri_ids - 1, 1:4] = self.tris
+        elements[self.quad_ids - 1, 0] = self.quad_ids
+        elements[self.quad_ids - 1, 1:5] = self.quads
+        return nodes, elements
+
+    @property
+    def n_nodes(self):
+        return len(self.coords)
+
+    @property
+    def n_elements(self):
+        return len(self.tri_ids) + len(self.quad_ids)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def astype(self, dtype):
+        return Mesh(self.coords.astype(dtype), self.tri_ids, self.tris, self.quad_ids, self.quads)
+
+    def __repr__(self):
+        return (f"Mesh({self.n_nodes} nodes, {len(self.tris)} triangles, {len(self.quads)} quads, "
+                f"{self.coords.dtype}, {self.nbytes/1e6:.1f} MB)")
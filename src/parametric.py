@@ -0,0 +1,67 @@
+import numpy as np
+
+from .hypar import hypar, hypar_elements
+from .topology import topology_cache
+from .wedge import wedge_elements, wedge_unit
+
+# Incremental re-evaluation for interactive edits and parameter sweeps. Every generator is linear in Re, and the
+# nodes scale linearly with H, so a ParametricGeometry keeps a normalized grid for its N and turns a change of H, Re
+# or Ne into a few rescaling passes over arrays it already owns instead of a full regeneration:
+#   pyramid: x = H*x_unit, y = H*tan(psi)*y_unit, z = Re*x_unit
+#   dome:    x = H*x_unit, y = H*tan(psi)*y_unit, z = Re*(cos(psi)**2*x_unit**2 + sin(psi)**2*y_unit**2)
+#   hypar:   x, y = H*(unit hypar for Ne), z = Re*(unit hypar for Ne); only an Ne change rebuilds the unit hypar.
+# evaluate() updates and returns the same nodes array every time, so copy it if an earlier result must be kept.
+
+SHAPES = ('hypar', 'pyramid', 'dome')
+
+
+class ParametricGeometry:
+
+    def __init__(self, shape, N):
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape '{shape}', expected one of {', '.join(SHAPES)}")
+        self.shape = shape
+        self.N = N
+        self.H = self.Re = self.Ne = None
+
+        if shape == 'hypar':
+            self._unit = None  # Unit hypar (H = Re = 1) for self.Ne, rebuilt only when Ne changes
+            self.elements = topology_cache.get('hypar', N, hypar_elements)
+        else:
+            self._x_unit, self._y_unit = wedge_unit(N)
+            if shape == 'dome':
+                self._x_unit_sq = self._x_unit**2
+                self._y_unit_sq = self._y_unit**2
+            self.elements = topology_cache.get('wedge', N, wedge_elements)
+
+        nodes_tot = (N+1)**2
+        self.nodes = np.empty((nodes_tot, 4))
+        self.nodes[:, 0] = np.arange(1, nodes_tot+1)
+
+    def evaluate(self, H, Re, Ne):
+        H_changed = H != self.H
+        Re_changed = Re != self.Re
+        Ne_changed = Ne != self.Ne
+        psi = np.pi/Ne
+
+        if self.shape == 'hypar':
+            if Ne_changed:
+                self._unit = hypar(1.0, 1.0, Ne, self.N)[0]
+            if H_changed or Ne_changed:
+                np.multiply(self._unit[:, 1:3], H, out=self.nodes[:, 1:3])
+            if Re_changed or Ne_changed:
+                np.multiply(self._unit[:, 3], Re, out=self.nodes[:, 3])
+        else:
+            if H_changed:
+                np.multiply(self._x_unit, H, out=self.nodes[:, 1])
+            if H_changed or Ne_changed:
+                np.multiply(self._y_unit, H*np.tan(psi), out=self.nodes[:, 2])
+            if self.shape == 'pyramid' and Re_changed:
+                np.multiply(self._x_unit, Re, out=self.nodes[:, 3])
+            elif self.shape == 'dome' and (Re_changed or Ne_changed):
+                z = self.nodes[:, 3]
+                np.multiply(self._x_unit_sq, Re*np.cos(psi)**2, out=z)
+                z += Re*np.sin(psi)**2*self._y_unit_sq
+
+        self.H, self.Re, self.Ne = H, Re, Ne
+        return self.nodes, self.elements
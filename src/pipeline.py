@@ -0,0 +1,195 @@
+import os
+
+from .assembly import assemble
+from .cache import ResultCache
+from .connectivity import frames as frame_elements
+from .dome import dome, iter_dome
+from .export import EXPORTERS, STRIP_EXPORTERS, output_paths
+from .grading import parse_grading, stations
+from .hypar import hypar, iter_hypar
+from .profiling import stage
+from .pyramid import iter_pyramid, pyramid
+from .quality import validate
+from .renumber import renumber
+from .store import save_mesh
+from .symmetry import SymmetricMesh, save_symmetric
+
+# Generate-and-export steps shared by the GUI (umbrella.py) and the headless command line (cli.py). Nothing in here
+# touches tkinter or matplotlib, so it can run in worker processes and on machines without a display.
+
+# Shape key -> (name used in output filenames, geometry function)
+GEOMETRIES = {
+    'hypar': ('Hypar', hypar),
+    'pyramid': ('Pyramid', pyramid),
+    'dome': ('Parabola', dome),
+}
+
+# Output formats: the exporters of export.py plus 'sym', the symmetry-compressed full umbrella (symmetry.py).
+FORMATS = [*EXPORTERS, 'sym']
+
+# Shape key -> strip generator variant (see stream.py)
+STREAMING = {
+    'hypar': iter_hypar,
+    'pyramid': iter_pyramid,
+    'dome': iter_dome,
+}
+
+
+def check_parameters(Ne, H, N):
+    # Raises ValueError for parameters no generator can mesh: fewer than 3 sides (Ne=2 puts tan(pi/2) into the
+    # coordinates), no elements along the apothem or a non-positive apothem.
+    if Ne < 3 or N < 1 or H <= 0:
+        raise ValueError("Ne must be at least 3, N at least 1 and H positive")
+
+
+def output_filename(name, Ne, H, Re, N, fmt='xlsx', grading=None):
+    # Graded meshes (grading.py) get the grading as a suffix, e.g. Parabola6_H4.0_R1.0_N100_adaptive0.001.s2k.
+    kind, value = parse_grading(grading)
+    suffix = '' if kind == 'uniform' else f"_{kind}{value:g}"
+    return f"{name}{Ne}_H{H}_R{Re}_N{N}{suffix}.{fmt}"
+
+
+def output_name(shape, full=False):
+    name = GEOMETRIES[shape][0]
+    return f"{name}Full" if full else name
+
+
+def generate(shape, H, Re, Ne, N, full=False, grading=None):
+    # With a grading the grid lines are placed by grading.py; an adaptive grading may use fewer than N intervals.
+    t = stations(grading, shape, H, Re, Ne, N)
+    if t is not None:
+        N = len(t) - 1
+    with stage(f"{shape}.generate"):
+        nodes, elements = GEOMETRIES[shape][1](H, Re, Ne, N, stations=t)
+    if full:
+        with stage('assemble'):
+            nodes, elements = assemble(nodes, elements, Ne)
+    return output_name(shape, full), nodes, elements
+
+
+def export(name, nodes, elements, Ne, H, Re, N, output_dir, fmt='xlsx', grading=None, frames=False, quality=True):
+    # With frames, frame elements along the ribs and the outer edges (connectivity.py) are exported with the areas.
+    # Unless quality is False the mesh is validated first (quality.py), with the default thresholds for True or a dict
+    # overriding some of them, and a MeshQualityError is raised before anything is written.
+    if quality is not False:
+        validate(nodes, elements, None if quality is True else quality)
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, output_filename(name, Ne, H, Re, N, fmt, grading))
+    frm_ij = frame_elements(nodes, elements, Ne) if frames else None
+    with stage(f"export.{fmt}"):
+        if fmt == 'mesh':
+            # The binary store also records the parameters, so a stored mesh can be identified without its file name.
+            save_mesh(filepath, nodes, elements, {'name': name, 'Ne': Ne, 'H': H, 'Re': Re, 'N': N, 'grading': grading},
+                      frm_ij)
+        else:
+            EXPORTERS[fmt](filepath, nodes, elements, frm_ij)
+    return filepath
+
+
+def generate_and_export(shape, Ne, H, Re, N, output_dir, fmt='xlsx', full=False, use_cache=True, on_stage=None,
+                        renumber_nodes=False, grading=None, frames=False, quality=True):
+    # Top-level function (not a closure) so it can be sent to a process pool.
+    # With use_cache the result cache (cache.py) is checked first: an unchanged earlier output is returned as is, and a
+    # stored mesh of the same geometry is exported without generating it again. on_stage(stage) is called before the
+    # 'generating' and 'exporting' steps, so the GUI can show progress (and cancel by raising). With renumber_nodes the
+    # nodes get a bandwidth-reducing numbering (renumber.py) and on_stage also receives the bandwidth before and after.
+    on_stage = on_stage or (lambda stage: None)
+    if fmt == 'sym':
+        if renumber_nodes or frames:
+            raise ValueError("The sym format stores the wedge once and cannot hold a renumbered umbrella or frames")
+        return symmetric_export(shape, Ne, H, Re, N, output_dir, use_cache, on_stage, grading, quality)
+
+    def build():
+        name, nodes, elements = generate(shape, H, Re, Ne, N, full, grading)
+        if renumber_nodes:
+            nodes, elements, (before, after) = renumber(nodes, elements)
+            on_stage(f"renumbered, bandwidth {before} -> {after}")
+        return name, nodes, elements
+
+    if not use_cache:
+        on_stage('generating')
+        name, nodes, elements = build()
+        on_stage('exporting')
+        return export(name, nodes, elements, Ne, H, Re, N, output_dir, fmt, grading, frames, quality)
+
+    cache = ResultCache(output_dir)
+    params = {'shape': shape, 'Ne': Ne, 'H': H, 'Re': Re, 'N': N, 'full': full, 'renumber': renumber_nodes,
+              'grading': grading}
+    # Frames only change what is exported, not the mesh, so they are part of the output key but not of the mesh key.
+    # The quality thresholds are part of the output key too, so stricter ones check a cached output again.
+    output_key = cache.key(fmt=fmt, frames=frames, quality=quality, **params)
+    with stage('cache.lookup'):
+        hit = cache.lookup(output_key)
+    if hit is not None:
+        return os.path.join(output_dir, output_filename(output_name(shape, full), Ne, H, Re, N, fmt, grading))
+
+    on_stage('generating')
+    mesh_key = cache.key(**params)
+    with stage('cache.load_mesh'):
+        stored = cache.load_mesh(mesh_key)
+    if stored is not None:
+        name = output_name(shape, full)
+        nodes, elements = stored
+    else:
+        name, nodes, elements = build()
+        if fmt != 'mesh':
+            with stage('cache.store_mesh'):
+                cache.store_mesh(mesh_key, nodes, elements, params)
+
+    on_stage('exporting')
+    filepath = export(name, nodes, elements, Ne, H, Re, N, output_dir, fmt, grading, frames, quality)
+    cache.record(output_key, output_paths(filepath, frames))
+    return filepath
+
+
+def symmetric_export(shape, Ne, H, Re, N, output_dir, use_cache=True, on_stage=None, grading=None, quality=True):
+    # The full umbrella in the 'sym' format: the wedge is generated and validated once and saved with its replication
+    # data (symmetry.py) instead of being assembled, which is about 1/Ne of the size. Always named as the full umbrella.
+    on_stage = on_stage or (lambda stage: None)
+    cache = ResultCache(output_dir) if use_cache else None
+    name = output_name(shape, full=True)
+    filepath = os.path.join(output_dir, output_filename(name, Ne, H, Re, N, 'sym', grading))
+    if cache:
+        output_key = cache.key(shape=shape, Ne=Ne, H=H, Re=Re, N=N, full=True, renumber=False, grading=grading,
+                               fmt='sym', frames=False, quality=quality)
+        if cache.lookup(output_key) is not None:
+            return filepath
+
+    on_stage('generating')
+    _, nodes, elements = generate(shape, H, Re, Ne, N, False, grading)
+    # Every copy is the wedge rotated, so the wedge's quality is the umbrella's.
+    if quality is not False:
+        validate(nodes, elements, None if quality is True else quality)
+    with stage('symmetry'):
+        mesh = SymmetricMesh.from_wedge(nodes, elements, Ne)
+    on_stage('exporting')
+    os.makedirs(output_dir, exist_ok=True)
+    with stage('export.sym'):
+        save_symmetric(filepath, mesh, {'name': name, 'Ne': Ne, 'H': H, 'Re': Re, 'N': N, 'grading': grading})
+    if cache:
+        cache.record(output_key, output_paths(filepath))
+    return filepath
+
+
+def stream_export(shape, Ne, H, Re, N, output_dir, fmt='xlsx', strip=None, use_cache=True, grading=None):
+    # Like generate_and_export() for a single tympan, but the mesh is generated strip by strip while it is written, so
+    # memory stays bounded for very large N. The finished file goes through the same result cache, but the mesh itself
+    # is never held in full and so is not stored.
+    cache = ResultCache(output_dir) if use_cache else None
+    if cache:
+        output_key = cache.key(shape=shape, Ne=Ne, H=H, Re=Re, N=N, full=False, renumber=False, grading=grading, fmt=fmt,
+                               frames=False)
+        if cache.lookup(output_key) is not None:
+            return os.path.join(output_dir, output_filename(GEOMETRIES[shape][0], Ne, H, Re, N, fmt, grading))
+
+    name = GEOMETRIES[shape][0]
+    t = stations(grading, shape, H, Re, Ne, N)
+    node_strips, element_strips = STREAMING[shape](H, Re, Ne, N if t is None else len(t) - 1, strip, t)
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, output_filename(name, Ne, H, Re, N, fmt, grading))
+    # Generation happens inside the writer as it pulls strips, so the generator stages are nested in this one.
+    with stage(f"export.{fmt}"):
+        STRIP_EXPORTERS[fmt](filepath, node_strips, element_strips)
+    if cache:
+        cache.record(output_key, output_paths(filepath))
+    return filepath
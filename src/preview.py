@@ -0,0 +1,61 @@
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from .pipeline import generate
+from .profiling import stage
+
+# Embedded 3D preview for the GUI. The mesh is drawn as one Poly3DCollection (faces plus element edges) on a canvas
+# that lives inside the Tk window and is reused from run to run: new parameters replace the vertices of the existing
+# collection instead of building a new figure. Fine meshes are previewed at a coarser level of detail, regenerated
+# from the same closed-form geometry, so the face count stays within a fixed budget and rotating the view stays smooth.
+
+MAX_FACES = 5000
+
+
+def face_vertices(nodes, elements):
+    # (E, 4, 3) corner coordinates per element. Triangles repeat their 3rd node as 4th corner, which draws the same
+    # triangle and keeps one array shape for the whole mesh.
+    conn = elements[:, 1:5].astype(np.int64)
+    conn[:, 3] = np.where(conn[:, 3] > 0, conn[:, 3], conn[:, 2])
+    return nodes[:, 1:4][conn - 1]
+
+
+def preview_N(N, copies=1, max_faces=MAX_FACES):
+    # A wedge has at most N**2 + N faces, so this N keeps copies*(N**2 + N) within max_faces.
+    return max(1, min(N, int((np.sqrt(1 + 4*max_faces/copies) - 1)/2)))
+
+
+class MeshPreview:
+
+    def __init__(self, parent, max_faces=MAX_FACES):
+        self.max_faces = max_faces
+        self.figure = Figure(figsize=(5, 4))
+        self.ax = self.figure.add_subplot(111, projection='3d')
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent)
+        self.widget = self.canvas.get_tk_widget()
+        self.surface = None
+
+    def show_mesh(self, nodes, elements, title=''):
+        with stage('preview.faces'):
+            verts = face_vertices(nodes, elements)
+            if self.surface is None:
+                self.surface = Poly3DCollection(verts, facecolor='lightsteelblue', edgecolor='black', linewidth=0.3)
+                self.ax.add_collection3d(self.surface)
+            else:
+                self.surface.set_verts(verts)
+
+        # Equal limits on all axes, as in the old scatter preview, but taken from the mesh so the full umbrella fits too.
+        span = float(np.abs(nodes[:, 1:4]).max()) if len(nodes) else 1.0
+        self.ax.set_xlim([-span, span])
+        self.ax.set_ylim([-span, span])
+        self.ax.set_zlim([-span, span])
+        self.ax.set_title(title)
+        self.canvas.draw_idle()
+
+    def show_shape(self, shape, H, Re, Ne, N, full=False):
+        N_lod = preview_N(N, Ne if full else 1, self.max_faces)
+        name, nodes, elements = generate(shape, H, Re, Ne, N_lod, full)
+        title = name if N_lod == N else f"{name} (preview at N={N_lod})"
+        self.show_mesh(nodes, elements, title)
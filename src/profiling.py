@@ -0,0 +1,120 @@
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Opt-in per-stage timing. The generators, the assembly, the exporters and the pipeline wrap their steps in
+#   with stage('hypar.grid'):
+#       ...
+# which records nothing unless tracing is enabled, either with the UMBRELLA_TRACE environment variable (set to the
+# trace file path, or to 1 for umbrella_trace.json) or with --trace on the command line (cli.py). When off, stage()
+# returns a shared no-op context manager, so the cost is one function call per stage, not per node.
+#
+# The trace is written in the Chrome trace event format: open it in chrome://tracing or https://ui.perfetto.dev to see
+# the timeline per process and thread. summary() gives the same data as a table of total time per stage.
+
+DEFAULT_TRACE = 'umbrella_trace.json'
+
+_NULL = nullcontext()
+_events = []
+_lock = threading.Lock()
+_trace_path = None
+_exit_registered = False
+
+
+def trace_path():
+    # Where the trace will be written, None while tracing is off.
+    return _trace_path
+
+
+def enable(path=DEFAULT_TRACE, write_at_exit=True):
+    # Turns tracing on; the summary is printed and the trace written when the process exits, unless write_at_exit is
+    # False (worker processes, whose events are merged into the parent's trace instead).
+    global _trace_path, _exit_registered
+    if write_at_exit and not _exit_registered:
+        atexit.register(_write_at_exit)
+        _exit_registered = True
+    _trace_path = path
+
+
+def stage(name):
+    if _trace_path is None:
+        return _NULL
+    return _record(name)
+
+
+@contextmanager
+def _record(name):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        event = {
+            'name': name, 'ph': 'X', 'ts': start/1000, 'dur': (end - start)/1000,
+            'pid': os.getpid(), 'tid': threading.get_ident(),
+        }
+        with _lock:
+            _events.append(event)
+
+
+def drain():
+    # Removes and returns the events recorded so far, e.g. to send them back from a worker process.
+    with _lock:
+        events = _events[:]
+        _events.clear()
+    return events
+
+
+def add_events(events):
+    with _lock:
+        _events.extend(events)
+
+
+def run_traced(trace_path, func, *args):
+    # Process pool wrapper: runs func with tracing on in the worker and returns (result, events) so the parent can
+    # merge the worker's timeline into its own. Top-level so it can be pickled.
+    enable(trace_path, write_at_exit=False)
+    drain()  # Workers are reused between jobs; only return this job's events
+    return func(*args), drain()
+
+
+def summary(events=None):
+    # Table of calls, total and mean time per stage, slowest first. Nested stages are counted in their parent too.
+    if events is None:
+        with _lock:
+            events = _events[:]
+    totals = defaultdict(lambda: [0, 0.0])
+    for event in events:
+        totals[event['name']][0] += 1
+        totals[event['name']][1] += event['dur']/1000
+
+    lines = [f"{'stage':<24}{'calls':>8}{'total ms':>12}{'mean ms':>12}"]
+    for name, (calls, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<24}{calls:>8}{total:>12.1f}{total/calls:>12.2f}")
+    return '\n'.join(lines)
+
+
+def write_trace(path=None):
+    path = path or _trace_path
+    with _lock:
+        events = _events[:]
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+
+def _write_at_exit():
+    if _events:
+        print(summary())
+        print(f"Trace written to {write_trace()}")
+
+
+# Only the main process writes the trace: worker processes inherit UMBRELLA_TRACE, but their jobs are traced through
+# run_traced(), which hands the events back instead of every worker overwriting the same file when it exits.
+if os.environ.get('UMBRELLA_TRACE') and multiprocessing.parent_process() is None:
+    enable(DEFAULT_TRACE if os.environ['UMBRELLA_TRACE'] == '1' else os.environ['UMBRELLA_TRACE'])
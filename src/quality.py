@@ -0,0 +1,215 @@
+import numpy as np
+
+from .profiling import stage
+
+# Mesh quality and geometry validation, run on the whole mesh before it is exported so that bad parameter combinations
+# (e.g. very small Ne, or a hypar whose delta_x/delta_y is close to singular) fail in seconds here instead of after a
+# SAP2000 import. Every metric is computed for all elements at once from the corner coordinates; triangles repeat
+# their first corner as 4th, which makes the quad formulas below give the triangle values without a separate pass.
+#
+# Per element:
+#   area      area of the element (for a warped quad, of its projection on the mean plane)
+#   aspect    longest / shortest edge
+#   warpage   angle in degrees between the normals of the two triangles of a quad, for the worse of both diagonals
+#             (0 for triangles)
+#   skew      largest deviation in degrees of a corner angle from the ideal (90 for quads, 60 for triangles)
+# Each is checked against a threshold; zero-area elements fail min_area. Errors independent of the thresholds: node ids
+# outside 1..n or repeated within an element, non-finite node coordinates and duplicate elements (same nodes as an
+# earlier one, in any order).
+
+# Default limits. They only reject meshes that are clearly broken; the generators' own meshes stay well inside them for
+# any sensible parameters. min_area is relative to the square of the element's longest edge.
+DEFAULT_THRESHOLDS = {
+    'max_aspect': 100.0,
+    'max_warpage': 30.0,
+    'max_skew': 85.0,
+    'min_area': 1e-9,
+}
+
+# Check name -> (metric, threshold key, True if the metric must stay below the threshold)
+CHECKS = {
+    'aspect': ('aspect', 'max_aspect', True),
+    'warpage': ('warpage', 'max_warpage', True),
+    'skew': ('skew', 'max_skew', True),
+    'zero area': ('relative_area', 'min_area', False),
+}
+
+
+class MeshQualityError(ValueError):
+
+    def __init__(self, report):
+        super().__init__(report.summary())
+        self.report = report
+
+    def __reduce__(self):
+        # Raised in worker processes and pickled back to the caller: the per-element metrics can be hundreds of MB for
+        # a large mesh, so only the summary data travels.
+        report = self.report
+        return MeshQualityError, (QualityReport(report.n_elements, report.thresholds, None, report.failures, report.worst),)
+
+
+def parse_thresholds(specs):
+    # ['max_aspect=20', 'max_warpage=10'] -> {'max_aspect': 20.0, 'max_warpage': 10.0}, as the command line takes them.
+    thresholds = {}
+    for spec in specs or []:
+        name, _, value = spec.partition('=')
+        if name not in DEFAULT_THRESHOLDS:
+            raise ValueError(f"Unknown quality threshold '{name}', expected one of {', '.join(DEFAULT_THRESHOLDS)}")
+        try:
+            thresholds[name] = float(value)
+        except ValueError:
+            raise ValueError(f"Quality threshold '{spec}' needs a number, e.g. {name}={DEFAULT_THRESHOLDS[name]:g}")
+    return thresholds
+
+
+def _dot(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+
+def _cross(a, b):
+    return a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0]
+
+
+def _sub(a, b):
+    return a[0] - b[0], a[1] - b[1], a[2] - b[2]
+
+
+def _cos(a, b):
+    return _dot(a, b)/np.sqrt(_dot(a, a)*_dot(b, b))
+
+
+def _degrees(cos):
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+def element_metrics(nodes, elements):
+    # Dict of per-element metric arrays (see above); elements must only reference valid node ids. Vectors are (x, y, z)
+    # tuples of (E,) arrays, one per corner or edge, so every step is an elementwise ufunc; np.cross, np.linalg.norm
+    # and reductions along a short axis of (E, 4, 3) arrays are several times slower for millions of elements. Angles
+    # are compared as cosines and only the worst one per element goes through arccos.
+    conn = np.asarray(elements[:, 1:5], dtype=np.int64)
+    is_tri = conn[:, 3] == 0
+    conn[is_tri, 3] = conn[is_tri, 0]
+    conn -= 1
+    coords = [np.asarray(nodes[:, k], dtype=np.float64) for k in (1, 2, 3)]
+    p = [tuple(c[conn[:, k]] for c in coords) for k in range(4)]
+
+    edge = [_sub(p[(k+1) % 4], p[k]) for k in range(4)]  # Corner k -> k+1; a triangle's 4th edge has length 0
+    length = [np.sqrt(_dot(e, e)) for e in edge]
+    longest = np.maximum(np.maximum(length[0], length[1]), np.maximum(length[2], length[3]))
+    shortest = np.minimum(np.minimum(length[0], length[1]), length[2])
+    shortest = np.where(is_tri, shortest, np.minimum(shortest, length[3]))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normal = _cross(_sub(p[2], p[0]), _sub(p[3], p[1]))
+        area = 0.5*np.sqrt(_dot(normal, normal))
+        aspect = longest/shortest
+        relative_area = area/longest**2
+
+        # Corner angle cosines, between the incoming edge reversed and the outgoing edge. A triangle's 1st corner comes
+        # in along its 3rd edge, and its 4th corner, on the zero-length edge, is ignored.
+        cos = [_cos(_sub((0, 0, 0), edge[k-1]), edge[k]) for k in range(4)]
+        cos[0] = np.where(is_tri, _cos(_sub((0, 0, 0), edge[2]), edge[0]), cos[0])
+        # Quads: the corner furthest from 90 degrees has the largest |cos|. Triangles: the sharpest corner has the
+        # largest cos and the bluntest the smallest.
+        quad_skew = np.degrees(np.arcsin(np.clip(np.maximum(np.maximum(np.abs(cos[0]), np.abs(cos[1])),
+                                                            np.maximum(np.abs(cos[2]), np.abs(cos[3]))), 0.0, 1.0)))
+        sharpest = _degrees(np.maximum(np.maximum(cos[0], cos[1]), cos[2]))
+        bluntest = _degrees(np.minimum(np.minimum(cos[0], cos[1]), cos[2]))
+        skew = np.where(is_tri, np.maximum(60 - sharpest, bluntest - 60), quad_skew)
+
+        n012 = _cross(_sub(p[1], p[0]), _sub(p[2], p[0]))
+        n023 = _cross(_sub(p[2], p[0]), _sub(p[3], p[0]))
+        n013 = _cross(_sub(p[1], p[0]), _sub(p[3], p[0]))
+        n123 = _cross(_sub(p[2], p[1]), _sub(p[3], p[1]))
+        warpage = np.where(is_tri, 0.0, _degrees(np.minimum(_cos(n012, n023), _cos(n013, n123))))
+
+    return {'area': area, 'aspect': aspect, 'relative_area': relative_area, 'warpage': warpage, 'skew': skew}
+
+
+def duplicate_elements(elements):
+    # Row indices of elements using the same set of nodes as an earlier element.
+    conn = np.sort(np.asarray(elements[:, 1:5], dtype=np.int64), axis=1)
+    # Rows sorted by node set (stable, so the first of equal rows keeps the lowest index), then compared to the previous.
+    order = np.lexsort(conn.T[::-1])
+    conn = conn[order]
+    same = (conn[1:] == conn[:-1]).all(axis=1)
+    return np.sort(order[1:][same])
+
+
+def invalid_elements(elements, n_nodes):
+    # Row indices of elements with a node id outside 1..n_nodes (0 is allowed as 4th node) or a node used twice.
+    conn = np.asarray(elements[:, 1:5], dtype=np.int64)
+    out_of_range = (conn[:, :3] < 1).any(axis=1) | (conn > n_nodes).any(axis=1) | (conn[:, 3] < 0)
+    ordered = np.sort(conn, axis=1)
+    repeated = ((ordered[:, 1:] == ordered[:, :-1]) & (ordered[:, 1:] > 0)).any(axis=1)
+    return np.flatnonzero(out_of_range | repeated)
+
+
+class QualityReport:
+
+    # failures maps each check that failed to the ids of its failing elements (column 0 of ele_ij, or node ids for
+    # 'non-finite node'); worst holds the worst value of every threshold check and metrics the element_metrics() arrays.
+    def __init__(self, n_elements, thresholds, metrics, failures, worst):
+        self.n_elements = n_elements
+        self.thresholds = thresholds
+        self.metrics = metrics
+        self.failures = failures
+        self.worst = worst
+
+    @property
+    def ok(self):
+        return not self.failures
+
+    def summary(self, limit=5):
+        lines = [f"Mesh quality: {self.n_elements} elements, {'OK' if self.ok else f'{len(self.failures)} failed check(s)'}"]
+        for check, (_, threshold, upper) in CHECKS.items():
+            if check in self.worst:
+                lines.append(f"  {check:<18} worst {self.worst[check]:>12.6g}   {'max' if upper else 'min'} "
+                             f"{self.thresholds[threshold]:g}   failing {len(self.failures.get(check, ()))}")
+        for check, ids in self.failures.items():
+            shown = ', '.join(str(int(i)) for i in ids[:limit])
+            lines.append(f"  {check}: {len(ids)} ({shown}{', ...' if len(ids) > limit else ''})")
+        return '\n'.join(lines)
+
+
+def check_quality(nodes, elements, thresholds=None):
+    # QualityReport for a mesh; thresholds override entries of DEFAULT_THRESHOLDS.
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    failures = {}
+    with stage('quality'):
+        ids = np.asarray(elements[:, 0], dtype=np.int64)
+        bad_nodes = np.flatnonzero(~np.isfinite(nodes[:, 1:4]).all(axis=1))
+        if len(bad_nodes):
+            failures['non-finite node'] = np.asarray(nodes[bad_nodes, 0], dtype=np.int64)
+        invalid = invalid_elements(elements, len(nodes))
+        if len(invalid):
+            failures['invalid connectivity'] = ids[invalid]
+            # The metrics need valid node references, so they are only computed for the remaining elements.
+            valid = np.ones(len(elements), dtype=bool)
+            valid[invalid] = False
+            elements, ids = elements[valid], ids[valid]
+        duplicates = duplicate_elements(elements)
+        if len(duplicates):
+            failures['duplicate element'] = ids[duplicates]
+
+        metrics = element_metrics(nodes, elements)
+        worst = {}
+        for check, (metric, threshold, upper) in CHECKS.items():
+            values = metrics[metric]
+            # NaN (from non-finite nodes or zero-length edges) counts as failing.
+            failing = ~(values <= thresholds[threshold]) if upper else ~(values >= thresholds[threshold])
+            if len(values):
+                finite = values[np.isfinite(values)]
+                worst[check] = float((finite.max() if upper else finite.min()) if len(finite) else np.nan)
+            if failing.any():
+                failures[check] = ids[failing]
+    return QualityReport(len(ids), thresholds, metrics, failures, worst)
+
+
+def validate(nodes, elements, thresholds=None):
+    # Raises MeshQualityError (a ValueError) with the report summary when any check fails, returns the report otherwise.
+    report = check_quality(nodes, elements, thresholds)
+    if not report.ok:
+        raise MeshQualityError(report)
+    return report
@@ -0,0 +1,120 @@
+import numpy as np
+
+from .profiling import stage
+from .topology import ELEMENT_DTYPE
+
+# Bandwidth-reducing node renumbering. The generators number nodes in loop order (for pyramid and dome the upper half,
+# then the lower half), so the node ids of one element can be up to ~N^2/2 apart, which gives SAP2000 a wide stiffness
+# matrix profile. renumber() applies a Reverse Cuthill-McKee ordering: a breadth-first search from a peripheral node
+# that visits neighbours by increasing degree, reversed. Nodes and elements are remapped consistently and element ids
+# and order are kept. scipy's implementation is used when it is installed, otherwise the numpy one below, which
+# processes a whole BFS level per step, so it loops over about 2N levels rather than over nodes.
+
+# Node pairs that share a stiffness entry: every pair of corners of an element (columns 1..4 of ele_ij).
+CORNER_PAIRS = [(a, b) for a in range(1, 5) for b in range(a+1, 5)]
+
+
+def node_adjacency(elements, n):
+    # CSR (indptr, indices) of the symmetric node graph, 0-based. Triangles have 0 as 4th node and skip those pairs.
+    conn = np.asarray(elements, dtype=np.int64)
+    pairs = np.concatenate([conn[:, [a, b]] for a, b in CORNER_PAIRS])
+    pairs = pairs[(pairs > 0).all(axis=1)] - 1
+    # Both directions, deduplicated and sorted by row then column through a single int64 key per pair.
+    keys = np.unique(np.concatenate((pairs[:, 0]*n + pairs[:, 1], pairs[:, 1]*n + pairs[:, 0])))
+    indptr = np.zeros(n+1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // n, minlength=n), out=indptr[1:])
+    return indptr, keys % n
+
+
+def bandwidth(elements):
+    # Largest difference between two node ids of the same element.
+    conn = np.asarray(elements)[:, 1:5]
+    high = conn.max(axis=1)
+    low = np.where(conn > 0, conn, np.inf).min(axis=1)
+    return int((high - low).max()) if len(conn) else 0
+
+
+def _neighbours(indptr, indices, frontier):
+    # Neighbours of the frontier nodes, grouped by frontier node in frontier order, plus each one's group number.
+    counts = indptr[frontier+1] - indptr[frontier]
+    starts = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts)
+    group = np.repeat(np.arange(len(frontier)), counts)
+    return indices[starts + np.arange(counts.sum())], group
+
+
+def _levels(indptr, indices, root, degree, visited):
+    # Cuthill-McKee BFS from root, marking nodes in `visited`. Within a level, nodes follow the order of the parents
+    # that reached them first, and each parent's children are taken by increasing degree.
+    order = [np.array([root])]
+    visited[root] = True
+    frontier = order[0]
+    while True:
+        nbrs, group = _neighbours(indptr, indices, frontier)
+        fresh = ~visited[nbrs]
+        nbrs, group = nbrs[fresh], group[fresh]
+        if not len(nbrs):
+            return order
+        nbrs = nbrs[np.lexsort((nbrs, degree[nbrs], group))]
+        _, first = np.unique(nbrs, return_index=True)
+        frontier = nbrs[np.sort(first)]
+        visited[frontier] = True
+        order.append(frontier)
+
+
+def _peripheral(indptr, indices, start, degree):
+    # Pseudo-peripheral start node: repeatedly jump to a lowest-degree node of the last BFS level while that makes the
+    # level structure deeper.
+    depth = -1
+    while True:
+        levels = _levels(indptr, indices, start, degree, np.zeros(len(degree), dtype=bool))
+        if len(levels) <= depth:
+            return start
+        depth = len(levels)
+        last = levels[-1]
+        start = int(last[np.argmin(degree[last])])
+
+
+def rcm_order(indptr, indices):
+    # 0-based old node index for each new position.
+    n = len(indptr) - 1
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+    except ImportError:
+        pass
+    else:
+        graph = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+        return np.asarray(reverse_cuthill_mckee(graph, symmetric_mode=True), dtype=np.int64)
+
+    degree = np.diff(indptr)
+    visited = np.zeros(n, dtype=bool)
+    order = []
+    # One BFS per connected component, each started from a peripheral node of the lowest-degree unvisited node.
+    for seed in np.argsort(degree, kind='stable'):
+        if visited[seed]:
+            continue
+        root = _peripheral(indptr, indices, int(seed), degree)
+        order.extend(_levels(indptr, indices, root, degree, visited))
+    return np.concatenate(order)[::-1]
+
+
+def renumber(nodes, elements):
+    # Returns (nodes, elements, (bandwidth before, bandwidth after)). Node ids are assumed to be 1..n in row order, as
+    # all generators and assemble() produce them. Node rows are reordered so node k is row k-1 again.
+    n = len(nodes)
+    with stage('renumber'):
+        order = rcm_order(*node_adjacency(elements, n))
+        new_id = np.empty(n+1, dtype=ELEMENT_DTYPE)
+        new_id[0] = 0  # Keeps the 0 placeholder of triangles
+        new_id[order+1] = np.arange(1, n+1)
+
+        nod_ij = np.array(nodes[order], dtype=np.float64)
+        nod_ij[:, 0] = np.arange(1, n+1)
+        ele_ij = np.array(elements, dtype=ELEMENT_DTYPE)
+        ele_ij[:, 1:5] = new_id[ele_ij[:, 1:5]]
+        before, after = bandwidth(elements), bandwidth(ele_ij)
+
+    # Cuthill-McKee is a heuristic; never hand back a worse numbering than the original.
+    if after > before:
+        return np.array(nodes, dtype=np.float64), np.array(elements, dtype=ELEMENT_DTYPE), (before, before)
+    return nod_ij, ele_ij, (before, after)
@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .grading import parse_grading
+from .mesh import Mesh
+from .pipeline import GEOMETRIES, check_parameters, generate
+from .quality import parse_thresholds, validate
+from .symmetry import SymmetricMesh
+
+# Local mesh service: one warm process serves hypar/pyramid/dome meshes over HTTP/JSON to every script and engineer on
+# the machine (or network), so nobody pays the interpreter and numpy start-up for each mesh. The asyncio front end only
+# parses requests and moves bytes; generation runs in a pool of worker processes, which keep their own topology cache
+# (topology.py) warm across requests.
+#
+#   python -m src.service --port 8765
+#   curl -o mesh.npz 'http://127.0.0.1:8765/mesh?shape=dome&Ne=6&H=4&Re=1.5&N=100&full=1'
+#
+# Endpoints:
+#   GET  /health            {"status": "ok"}
+#   GET  /stats             request counters and the size of the result store
+#   GET  /mesh?<params>     the mesh as an .npz file of the compact Mesh arrays (mesh.py: 'coords', 'tri_ids', 'tris',
+#   POST /mesh <json>       'quad_ids', 'quads'; fetch_mesh() turns them back into the generators' arrays) or, with
+#                           format=sym, the symmetry-compressed umbrella (symmetry.py: 'nodes', 'elements', 'rib',
+#                           'targets', 'Ne')
+# Parameters: shape, Ne, H, Re, N, and optionally full (default false), grading (grading.py spec), quality (false to
+# skip the check, or {"max_aspect": 20, ...} to override thresholds, see quality.py), format ('npz' or 'sym') and
+# float32 (default false: coordinates in single precision, npz only).
+#
+# Identical requests that arrive while one is being generated wait for that one instead of starting another, and
+# finished payloads are kept in an LRU store capped at max_bytes (UMBRELLA_SERVICE_MAX_MB, 512 MB by default), so
+# repeated requests are answered from memory. Responses are written in CHUNK-sized pieces as the client reads them;
+# X-Mesh-Source tells whether a response was generated, coalesced with an in-flight request or reused.
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BYTES = int(os.environ.get('UMBRELLA_SERVICE_MAX_MB', 512)) * 2**20
+CHUNK = 1 << 20
+PAYLOAD_FORMATS = ('npz', 'sym')
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def _flag(value):
+    # Booleans arrive as JSON booleans or as query strings ('1', 'true', ...).
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def parse_request(params):
+    # Normalized request parameters, which double as the coalescing/reuse key. Raises ValueError for invalid ones.
+    try:
+        shape = params['shape']
+        if shape not in GEOMETRIES:
+            raise ValueError(f"Unknown shape '{shape}', expected one of {', '.join(GEOMETRIES)}")
+        request = {'shape': shape, 'Ne': int(params['Ne']), 'H': float(params['H']), 'Re': float(params['Re']),
+                   'N': int(params['N'])}
+    except KeyError as e:
+        raise ValueError(f"Missing parameter {e}")
+    except TypeError as e:
+        raise ValueError(f"Invalid parameter: {e}")
+    check_parameters(request['Ne'], request['H'], request['N'])
+
+    request['full'] = _flag(params.get('full', False))
+    request['grading'] = params.get('grading') or None
+    parse_grading(request['grading'])
+    request['format'] = params.get('format', 'npz')
+    if request['format'] not in PAYLOAD_FORMATS:
+        raise ValueError(f"Unknown format '{request['format']}', expected one of {', '.join(PAYLOAD_FORMATS)}")
+    request['float32'] = _flag(params.get('float32', False))
+
+    # quality is True (default thresholds), false to skip the check, or threshold overrides: a JSON object, or
+    # max_aspect=20,max_warpage=10 in a query string.
+    quality = params.get('quality', True)
+    if isinstance(quality, dict):
+        quality = parse_thresholds(f"{name}={value}" for name, value in quality.items()) or True
+    elif isinstance(quality, str) and '=' in quality:
+        quality = parse_thresholds(quality.split(',')) or True
+    else:
+        quality = _flag(quality)
+    request['quality'] = quality
+    return request
+
+
+def build_payload(request):
+    # Runs in a worker process: generates the mesh, checks it and returns the serialized .npz bytes, so the arrays
+    # cross the process boundary once, already in their final, compact form (about 85% of the generators' arrays, see
+    # mesh.py), which is also what the result store keeps.
+    shape, Ne, H, Re, N = (request[key] for key in ('shape', 'Ne', 'H', 'Re', 'N'))
+    sym = request['format'] == 'sym'
+    _, nodes, elements = generate(shape, H, Re, Ne, N, request['full'] and not sym, request['grading'])
+    if request['quality'] is not False:
+        validate(nodes, elements, None if request['quality'] is True else request['quality'])
+
+    buffer = io.BytesIO()
+    if sym:
+        mesh = SymmetricMesh.from_wedge(nodes, elements, Ne)
+        np.savez(buffer, nodes=mesh.nodes, elements=mesh.elements.astype(np.int32), rib=mesh.rib,
+                 targets=mesh.targets, Ne=Ne)
+    else:
+        mesh = Mesh.from_arrays(nodes, elements, np.float32 if request['float32'] else np.float64)
+        np.savez(buffer, **{name: getattr(mesh, name) for name in Mesh.__slots__})
+    return buffer.getvalue()
+
+
+class MeshService:
+
+    def __init__(self, jobs=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.pool = ProcessPoolExecutor(max_workers=jobs)
+        self.max_bytes = max_bytes
+        self._inflight = {}
+        self._results = OrderedDict()
+        self._result_bytes = 0
+        self.stats = {'requests': 0, 'generated': 0, 'coalesced': 0, 'reused': 0, 'errors': 0}
+
+    async def mesh(self, request):
+        # (payload bytes, source) for a parse_request() result; source is 'generated', 'coalesced' or 'reused'.
+        key = json.dumps(request, sort_keys=True)
+        self.stats['requests'] += 1
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.stats['reused'] += 1
+            return self._results[key], 'reused'
+        if key in self._inflight:
+            self.stats['coalesced'] += 1
+            # shield: a client that disconnects must not cancel the job other clients are waiting for.
+            return await asyncio.shield(self._inflight[key]), 'coalesced'
+
+        future = asyncio.get_running_loop().run_in_executor(self.pool, build_payload, request)
+        self._inflight[key] = future
+        try:
+            payload = await asyncio.shield(future)
+        finally:
+            del self._inflight[key]
+        self.stats['generated'] += 1
+        self._store(key, payload)
+        return payload, 'generated'
+
+    def _store(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        self._results[key] = payload
+        self._result_bytes += len(payload)
+        while self._result_bytes > self.max_bytes:
+            _, evicted = self._results.popitem(last=False)  # Least recently used first
+            self._result_bytes -= len(evicted)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    # ---------------- HTTP ---------------- #
+
+    async def handle(self, reader, writer):
+        # One request per connection (Connection: close), which is all urllib, requests and curl need.
+        try:
+            status, headers, body = await self._respond(reader)
+        except Exception as e:
+            status, headers, body = 500, {}, json.dumps({'error': str(e)}).encode()
+        if status >= 400:
+            self.stats['errors'] += 1
+        headers.setdefault('Content-Type', 'application/json')
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", f"Content-Length: {len(body)}", 'Connection: close']
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        try:
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode())
+            view = memoryview(body)
+            for start in range(0, len(view), CHUNK):
+                writer.write(view[start:start+CHUNK])
+                await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        # (status, headers, body bytes) for the request on reader.
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            method, target = request_line[0], request_line[1]
+            length = 0
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            body = await reader.readexactly(length) if length else b''
+        except (IndexError, ValueError, asyncio.IncompleteReadError):
+            return 400, {}, json.dumps({'error': 'Malformed HTTP request'}).encode()
+
+        url = urllib.parse.urlsplit(target)
+        if url.path == '/health':
+            return 200, {}, json.dumps({'status': 'ok'}).encode()
+        if url.path == '/stats':
+            stats = {**self.stats, 'stored': len(self._results), 'stored_bytes': self._result_bytes,
+                     'inflight': len(self._inflight)}
+            return 200, {}, json.dumps(stats).encode()
+        if url.path != '/mesh':
+            return 404, {}, json.dumps({'error': f"No endpoint {url.path}"}).encode()
+        if method not in ('GET', 'POST'):
+            return 405, {}, json.dumps({'error': 'Use GET or POST'}).encode()
+
+        try:
+            params = json.loads(body) if method == 'POST' else dict(urllib.parse.parse_qsl(url.query))
+            if not isinstance(params, dict):
+                raise ValueError('Expected a JSON object of parameters')
+            request = parse_request(params)
+            payload, source = await self.mesh(request)
+        except ValueError as e:
+            # Invalid parameters, and meshes failing the quality check (MeshQualityError is a ValueError).
+            return 400, {}, json.dumps({'error': str(e)}).encode()
+        return 200, {'Content-Type': 'application/octet-stream', 'X-Mesh-Source': source}, payload
+
+
+async def serve(host='127.0.0.1', port=DEFAULT_PORT, jobs=None, max_bytes=DEFAULT_MAX_BYTES, ready=None):
+    # Runs until cancelled. ready(server) is called once it listens, e.g. to read the port when started with port=0.
+    service = MeshService(jobs, max_bytes)
+    server = await asyncio.start_server(service.handle, host, port)
+    if ready:
+        ready(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def fetch_mesh(url, **params):
+    # Client helper: (nodes, elements) from a running service, e.g. fetch_mesh('http://127.0.0.1:8765', shape='dome',
+    # Ne=6, H=4, Re=1.5, N=100, full=True). With format='sym' the .npz arrays are returned as a dict instead.
+    data = json.dumps(params).encode()
+    request = urllib.request.Request(f"{url.rstrip('/')}/mesh", data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request) as response:
+        arrays = np.load(io.BytesIO(response.read()))
+    if params.get('format') == 'sym':
+        return dict(arrays)
+    return Mesh(*(arrays[name] for name in Mesh.__slots__)).to_arrays()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m src.service', description='Serve tympan meshes over HTTP/JSON from a warm worker pool.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1, this machine only)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--max-mb', type=int, default=DEFAULT_MAX_BYTES // 2**20, help='Memory for reusable results in MB (default: 512)')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def ready(server):
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f"Serving meshes on http://{host}:{port}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, args.max_mb * 2**20, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+import hashlib
+import importlib
+import inspect
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+# Binary mesh store. A stored mesh is a folder (<name>.mesh) holding
+#   nodes.npy     (n, 4) float64 [Node#, X, Y, Z], the same layout the generators return
+#   elements.npy  (E, 5) int32 [Element ID, Node1..Node4], 0 as 4th node for triangles
+#   frames.npy    (F, 3) int32 [Frame ID, NodeI, NodeJ], only when frames were exported (see connectivity.py)
+#   meta.json     parameters, array shapes and the generator version
+# Plain .npy files can be opened with np.load(mmap_mode='r'), so previews, assemblies and exporters can work on
+# multi-million-node meshes straight from disk without reading them into memory first.
+
+STORE_VERSION = 1
+
+
+# Modules whose code decides what ends up in a written mesh or output file: generation, assembly, grading, renumbering,
+# frames, quality checks, the exporters and the store formats themselves.
+VERSIONED_MODULES = ('hypar', 'wedge', 'pyramid', 'dome', 'assembly', 'stream', 'topology', 'grading', 'renumber',
+                     'connectivity', 'quality', 'export', 'store', 'symmetry', 'pipeline')
+
+
+def _constant_repr(value):
+    # repr() of a plain constant that is the same in every process (sets are sorted, since string hashes are randomized
+    # per process), or None for anything else: functions, arrays and other objects whose repr holds an address.
+    if value is None or isinstance(value, (str, bytes, int, float, complex)):
+        return repr(value)
+    if isinstance(value, (tuple, list)):
+        items = [_constant_repr(item) for item in value]
+        return None if None in items else f"{type(value).__name__}({', '.join(items)})"
+    if isinstance(value, (set, frozenset)):
+        items = [_constant_repr(item) for item in value]
+        return None if None in items else f"set({', '.join(sorted(items))})"
+    if isinstance(value, dict):
+        items = [(_constant_repr(k), _constant_repr(v)) for k, v in value.items()]
+        return None if any(None in item for item in items) else f"dict({', '.join(f'{k}: {v}' for k, v in items)})"
+    return None
+
+
+def _hash_code(digest, code):
+    # The path-independent parts of a code object (not co_filename or line numbers, so a copy of the tree in another
+    # folder gets the same version), including nested functions, lambdas and comprehensions.
+    digest.update(code.co_code)
+    digest.update(repr((code.co_names, code.co_varnames, code.co_freevars, code.co_cellvars)).encode())
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            _hash_code(digest, const)
+        else:
+            digest.update(str(_constant_repr(const)).encode())
+
+
+@lru_cache(maxsize=None)
+def generator_version():
+    # Hash of the compiled code and constants of every module in VERSIONED_MODULES, so any change to how meshes are
+    # generated or written gives a new version. Uses code objects rather than source files so it also works in the
+    # .exe build. The modules are imported here rather than at the top, since most of them import this one.
+    digest = hashlib.sha256()
+    for module_name in VERSIONED_MODULES:
+        module = importlib.import_module(f".{module_name}", __package__)
+        digest.update(module_name.encode())
+        for name, obj in sorted(vars(module).items()):
+            if inspect.isfunction(obj) and obj.__module__ == module.__name__:
+                digest.update(name.encode())
+                _hash_code(digest, obj.__code__)
+            elif inspect.isclass(obj) and obj.__module__ == module.__name__:
+                digest.update(name.encode())
+                for attr, member in sorted(vars(obj).items()):
+                    function = getattr(member, '__func__', member)  # classmethods and staticmethods
+                    if inspect.isfunction(function):
+                        digest.update(attr.encode())
+                        _hash_code(digest, function.__code__)
+            elif not name.startswith('__') and _constant_repr(obj) is not None:
+                # Module-level constants such as export.FLOAT_FMT, which the code only refers to by name.
+                digest.update(name.encode())
+                digest.update(_constant_repr(obj).encode())
+    return digest.hexdigest()[:16]
+
+
+def save_mesh(path, nodes, elements, params=None, frames=None):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'nodes.npy'), np.ascontiguousarray(nodes, dtype=np.float64))
+    np.save(os.path.join(path, 'elements.npy'), np.ascontiguousarray(elements, dtype=np.int32))
+    if frames is not None:
+        np.save(os.path.join(path, 'frames.npy'), np.ascontiguousarray(frames, dtype=np.int32))
+    meta = {
+        'store_version': STORE_VERSION,
+        'generator_version': generator_version(),
+        'params': params or {},
+        'nodes': list(np.shape(nodes)),
+        'elements': list(np.shape(elements)),
+    }
+    if frames is not None:
+        meta['frames'] = list(np.shape(frames))
+    # meta.json is written last, so a folder without it is an incomplete save.
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_mesh(path, mmap=True):
+    # Returns (nodes, elements, frames, meta), frames None when the mesh was saved without them. With mmap=True the
+    # arrays are read-only memory maps of the files on disk.
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        raise FileNotFoundError(f"No stored mesh at {path}")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('store_version') != STORE_VERSION:
+        raise ValueError(f"{path} uses mesh store version {meta.get('store_version')}, expected {STORE_VERSION}")
+
+    mmap_mode = 'r' if mmap else None
+    nodes = np.load(os.path.join(path, 'nodes.npy'), mmap_mode=mmap_mode)
+    elements = np.load(os.path.join(path, 'elements.npy'), mmap_mode=mmap_mode)
+    frames = np.load(os.path.join(path, 'frames.npy'), mmap_mode=mmap_mode) if 'frames' in meta else None
+    return nodes, elements, frames, meta
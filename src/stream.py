@@ -0,0 +1,15 @@
+# Strip-by-strip generation. The generators fill their node and element arrays column by column ("for col in ...")
+# and the streaming variants (iter_hypar, iter_pyramid, iter_dome) yield those columns in groups ("strips") instead of
+# allocating the whole mesh, in the same order and with the same ids as the full arrays. Exporters consume the strips
+# as they come, so peak memory is one strip plus the writer's buffers, whatever N is.
+
+# Default strip size, in nodes. Strips are whole columns, so this is rounded to a number of columns.
+STRIP_NODES = 65536
+
+
+def strip_ranges(ncols, col_size, strip=None):
+    # [start, stop) column ranges covering range(ncols). strip is the number of columns per strip; by default it is
+    # picked so that a strip holds about STRIP_NODES entries of col_size each.
+    if strip is None:
+        strip = max(1, STRIP_NODES // max(col_size, 1))
+    return [(start, min(start + strip, ncols)) for start in range(0, ncols, strip)]
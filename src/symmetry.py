@@ -0,0 +1,150 @@
+import json
+import os
+
+import numpy as np
+
+from .assembly import assemble, rib_targets, rotation_matrices
+from .store import STORE_VERSION, generator_version
+from .topology import ELEMENT_DTYPE
+
+# Symmetry-compressed full umbrella. The assembled umbrella is Ne copies of the tympan wedge rotated by 2*psi*k (the
+# mirroring of sym() is already inside the wedge), so it is fully described by
+#   nodes, elements  the wedge as hypar()/pyramid()/dome() return it
+#   Ne               the number of copies; copy k is rotate(x, y, 2*psi, k), see assembly.rotation_matrices()
+#   rib, targets     the shared-edge node mapping of assembly.rib_targets(): which rib nodes of each copy are merged
+#                    into a node of another copy
+# which is about 1/Ne of the assembled arrays. expand() materializes the whole umbrella through assemble() (identical to
+# generating it with full=True); wedge(k) and iter_wedges() materialize one copy at a time, with the same global node
+# and element ids, for consumers that stream the umbrella.
+#
+# Saved as a folder (<name>.sym) next to the binary store format (store.py):
+#   nodes.npy, elements.npy   the wedge
+#   rib.npy, targets.npy      the node mapping
+#   meta.json                 Ne, the rotation angles, the assembled node/element counts, parameters and versions
+
+
+class SymmetricMesh:
+
+    __slots__ = ('nodes', 'elements', 'Ne', 'rib', 'targets', '_merged', '_offsets')
+
+    def __init__(self, nodes, elements, Ne, rib, targets):
+        self.nodes = nodes
+        self.elements = elements
+        self.Ne = Ne
+        self.rib = np.asarray(rib, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+
+        # merged[k, i]: copy k of rib node i is merged into another node. Copy k keeps n - merged[k].sum() nodes and
+        # its first kept node follows all kept nodes of the copies before it.
+        n = len(nodes)
+        self._merged = self.targets != np.arange(Ne)[:, None]*n + self.rib
+        kept = n - self._merged.sum(axis=1)
+        self._offsets = np.concatenate(([0], np.cumsum(kept)))
+
+    @classmethod
+    def from_wedge(cls, nodes, elements, Ne, tol=None):
+        return cls(nodes, elements, Ne, *rib_targets(nodes, Ne, tol))
+
+    @property
+    def rotations(self):
+        # Rotation angle of each copy, in radians.
+        return 2*np.pi/self.Ne*np.arange(self.Ne)
+
+    @property
+    def n_nodes(self):
+        return int(self._offsets[-1])
+
+    @property
+    def n_elements(self):
+        return self.Ne*len(self.elements)
+
+    def node_ids(self, k, j):
+        # 1-based assembled node ids of copy k of wedge node indices j (0-based), for arrays k and j. Copy k's kept
+        # nodes are numbered in order after the earlier copies; a merged node takes the id of the node it was merged
+        # into, which is always a kept one.
+        k, j = np.broadcast_arrays(np.asarray(k, dtype=np.int64), np.asarray(j, dtype=np.int64))
+        n = len(self.nodes)
+        slot = np.searchsorted(self.rib, j)
+        on_rib = (slot < len(self.rib)) & (self.rib[np.minimum(slot, len(self.rib)-1)] == j)
+        target = np.where(on_rib, self.targets[k, np.minimum(slot, len(self.rib)-1)], k*n + j)
+        k, j = np.divmod(target, n)
+        # Rank of j among the kept nodes of copy k: j minus the merged rib nodes before it.
+        merged_before = np.cumsum(self._merged, axis=1) - self._merged
+        slot = np.searchsorted(self.rib, j)
+        before = np.where(slot < len(self.rib), merged_before[k, np.minimum(slot, len(self.rib)-1)],
+                          self._merged[k].sum(axis=-1))
+        return self._offsets[k] + j - before + 1
+
+    def wedge_nodes(self, k):
+        # nod_ij rows of the nodes copy k adds to the umbrella, with assembled ids; its merged rib nodes belong to an
+        # earlier copy.
+        n = len(self.nodes)
+        keep = np.ones(n, dtype=bool)
+        keep[self.rib[self._merged[k]]] = False
+        xy = np.einsum('ij,nj->ni', rotation_matrices(self.Ne)[k], self.nodes[keep, 1:3])
+
+        nod_ij = np.empty((int(keep.sum()), 4))
+        nod_ij[:, 0] = np.arange(self._offsets[k]+1, self._offsets[k+1]+1)
+        nod_ij[:, 1:3] = xy
+        nod_ij[:, 3] = self.nodes[keep, 3]
+        return nod_ij
+
+    def wedge_elements(self, k):
+        # ele_ij rows of all elements of copy k, with assembled element and node ids.
+        n = len(self.nodes)
+        node_id = np.zeros(n+1, dtype=ELEMENT_DTYPE)  # Index 0 keeps the 0 of triangles
+        node_id[1:] = self.node_ids(k, np.arange(n))
+        E = len(self.elements)
+        ele_ij = np.empty((E, self.elements.shape[1]), dtype=ELEMENT_DTYPE)
+        ele_ij[:, 0] = np.arange(k*E+1, (k+1)*E+1)
+        ele_ij[:, 1:] = node_id[np.asarray(self.elements[:, 1:], dtype=np.int64)]
+        return ele_ij
+
+    def wedge(self, k):
+        return self.wedge_nodes(k), self.wedge_elements(k)
+
+    def iter_wedges(self):
+        # (node_strips, element_strips) generators over the copies in order, which the strip exporters in export.py
+        # take directly, so the umbrella is written without ever being held in full.
+        return (self.wedge_nodes(k) for k in range(self.Ne)), (self.wedge_elements(k) for k in range(self.Ne))
+
+    def expand(self):
+        # The whole umbrella in one go, as assemble() would build it from the wedge.
+        return assemble(self.nodes, self.elements, self.Ne, rib_map=(self.rib, self.targets))
+
+
+def save_symmetric(path, mesh, params=None):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'nodes.npy'), np.ascontiguousarray(mesh.nodes, dtype=np.float64))
+    np.save(os.path.join(path, 'elements.npy'), np.ascontiguousarray(mesh.elements, dtype=np.int32))
+    np.save(os.path.join(path, 'rib.npy'), mesh.rib)
+    np.save(os.path.join(path, 'targets.npy'), mesh.targets)
+    meta = {
+        'store_version': STORE_VERSION,
+        'generator_version': generator_version(),
+        'params': params or {},
+        'Ne': mesh.Ne,
+        'rotations': mesh.rotations.tolist(),
+        'nodes': [mesh.n_nodes, 4],
+        'elements': [mesh.n_elements, 5],
+    }
+    # meta.json is written last, so a folder without it is an incomplete save.
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def load_symmetric(path, mmap=True):
+    # Returns (SymmetricMesh, meta). With mmap=True the wedge arrays are read-only memory maps of the files on disk.
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        raise FileNotFoundError(f"No symmetric mesh at {path}")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('store_version') != STORE_VERSION:
+        raise ValueError(f"{path} uses mesh store version {meta.get('store_version')}, expected {STORE_VERSION}")
+
+    mmap_mode = 'r' if mmap else None
+    nodes, elements, rib, targets = (np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+                                     for name in ('nodes', 'elements', 'rib', 'targets'))
+    return SymmetricMesh(nodes, elements, meta['Ne'], rib, targets), meta
@@ -0,0 +1,71 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .profiling import stage
+
+# Element connectivity only depends on the layout ("hypar" or "wedge") and the subdivision count N, never on H, Re or
+# Ne. Sweeps over those parameters at a fixed N would otherwise rebuild the same element array on every call, so the
+# arrays are cached here, shared between callers and marked read-only so nobody can modify a cached copy by accident.
+#
+# Every process (GUI and service workers included) keeps its own cache, so it is bounded by the total size of the
+# arrays rather than by the number of entries: max_bytes (UMBRELLA_TOPOLOGY_MAX_MB, 256 MB by default), evicting the
+# least recently used N first. An array larger than that on its own is returned without being kept.
+
+# Connectivity dtype of the generators: node and element ids fit in int32 up to N of about 46000, and the arrays are
+# less than half the size of float64 ones.
+ELEMENT_DTYPE = np.int32
+
+DEFAULT_MAX_BYTES = int(os.environ.get('UMBRELLA_TOPOLOGY_MAX_MB', 256)) * 2**20
+
+
+class TopologyCache:
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, layout, N, build):
+        key = (layout, int(N))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        # Build outside the lock; two threads racing on the same key just build it twice and keep the first result.
+        with stage(f"{layout}.connectivity"):
+            ele_ij = build(N)
+        ele_ij.setflags(write=False)
+
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                return self._entries[key]
+            if ele_ij.nbytes <= self.max_bytes:
+                self._entries[key] = ele_ij
+                self.nbytes += ele_ij.nbytes
+                while self.nbytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)  # Evict the least recently used N
+                    self.nbytes -= evicted.nbytes
+        return ele_ij
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# One cache per process, shared by every generator.
+topology_cache = TopologyCache()
@@ -0,0 +1,149 @@
+import numpy as np
+
+from .profiling import stage
+from .stream import strip_ranges
+from .topology import ELEMENT_DTYPE, topology_cache
+
+# Shared triangular-wedge grid used by pyramid.py and dome.py. Both tympans lay out their nodes and elements the same
+# way and only differ in how z is computed, so the layout lives here and the shape modules just supply get_z(x, y).
+# Everything is built with index arithmetic on arrays, there are no Python loops over nodes or elements.
+
+def triangle_index(n, start=0, stop=None):
+    # (col, i) pairs of the loop "for col in range(start, stop): for i in range(n-col)", in the same order.
+    if stop is None:
+        stop = n
+    counts = n - np.arange(start, stop)
+    col = np.repeat(np.arange(start, stop), counts)
+    starts = np.cumsum(counts) - counts
+    i = np.arange(col.size) - np.repeat(starts, counts)
+    return col, i
+
+
+def triangle_offset(n, col):
+    # Number of (col, i) pairs that come before column col in triangle_index(n).
+    return col*n - col*(col-1)//2
+
+
+def wedge_unit_strip(N, upper, start=0, stop=None, stations=None):
+
+    # Normalized layout for H = 1 and tan(psi) = 1. x/y of any wedge are x_unit*H and y_unit*H*tan(psi), which lets
+    # parametric.py rescale an existing grid instead of rebuilding it when only H or Ne changes. stations are the N+1
+    # grid line positions in [0, 1] (see grading.py), uniform by default.
+    x_base_i = np.linspace(0,1,N+1) if stations is None else np.asarray(stations)
+
+    if upper:
+        # Upper half (y >= 0): for col in range(N+1), N+1-col nodes starting at x_base_i[col].
+        col, i = triangle_index(N+1, start, stop)
+        return x_base_i[i+col], x_base_i[col]
+
+    # Lower half (y < 0): for col in range(N), N-col nodes starting at x_base_i[col+1].
+    col, i = triangle_index(N, start, stop)
+    return x_base_i[i+1+col], -x_base_i[col+1]
+
+
+def wedge_unit(N, stations=None):
+
+    x_up, y_up = wedge_unit_strip(N, True, stations=stations)
+    x_low, y_low = wedge_unit_strip(N, False, stations=stations)
+    return np.concatenate((x_up, x_low)), np.concatenate((y_up, y_low))
+
+
+def wedge_nodes(H, Ne, N, stations=None):
+
+    psi = np.pi/Ne
+    x_unit, y_unit = wedge_unit(N, stations)
+    return H*x_unit, H*np.tan(psi)*y_unit
+
+
+def wedge_element_strip(N, upper, start=0, stop=None):
+
+    # Element ids and node ids follow the original two-pass loops: the first pass walks the upper half, the second the
+    # lower half, and the first element of every column (i == 0) is a triangle whose 4th node is left as 0. This
+    # builds columns start..stop-1 of one pass.
+    col, i = triangle_index(N, start, stop)
+    tri = i == 0
+    quad = ~tri
+
+    ele_ij = np.zeros((col.size,5), dtype=ELEMENT_DTYPE)
+    ele = (0 if upper else (N**2+N)//2) + triangle_offset(N, start) + 1 + np.arange(col.size)
+    ele_ij[:, 0] = ele
+
+    if upper:
+        # First pass (upper half)
+        n1 = ele + col
+        ele_ij[:, 1] = n1
+        ele_ij[:, 2] = np.where(tri, n1 + (N+1) - col, n1 + N - col)
+        ele_ij[:, 3] = np.where(tri, n1 + 1, n1 + N - col + 1)
+        ele_ij[:, 4] = np.where(quad, n1 + 1, 0)
+    else:
+        # Second pass (lower half)
+        n2 = np.where(col == 0, np.where(tri, 1, i + 1), ele + col)
+        ele_ij[:, 1] = np.where(tri, ele + (N+1), ele + N)
+        ele_ij[:, 2] = n2
+        ele_ij[:, 3] = n2 + 1
+        ele_ij[:, 4] = np.where(quad, ele + (N+1), 0)
+
+    return ele_ij
+
+
+def wedge_elements(N):
+
+    return np.concatenate((wedge_element_strip(N, True), wedge_element_strip(N, False)))
+
+
+def node_block(first_id, x_i, y_i, z_i):
+    # [Node#, X, Y, Z] rows with consecutive ids starting at first_id.
+    nodes_tot = x_i.size
+    nodes_ij = np.empty((nodes_tot, 4))
+    nodes_ij[:, 0] = np.arange(first_id, first_id+nodes_tot)
+    nodes_ij[:, 1] = x_i
+    nodes_ij[:, 2] = y_i
+    nodes_ij[:, 3] = z_i
+    return nodes_ij
+
+
+def wedge_surface(H, Ne, get_z):
+
+    # get_z in the parameter space of the grid: z at apothem fraction t and transverse position w (|w| <= t), which
+    # grading.py uses to place the stations.
+    tan_psi = np.tan(np.pi/Ne)
+    return lambda t, w: get_z(t*H, w*H*tan_psi)
+
+
+def wedge(H, Ne, N, get_z, stations=None):
+
+    # get_z(x, y) is the only shape-specific part; it is evaluated once over the whole node array.
+    with stage('wedge.grid'):
+        x_i, y_i = wedge_nodes(H, Ne, N, stations)
+    with stage('wedge.z'):
+        z_i = get_z(x_i, y_i)
+    nodes_ij = node_block(1, x_i, y_i, z_i)
+
+    # Pyramid and dome share one connectivity per N, served read-only from the topology cache.
+    return nodes_ij, topology_cache.get('wedge', N, wedge_elements)
+
+
+def iter_wedge(H, Ne, N, get_z, strip=None, stations=None):
+
+    # Streaming wedge(): returns (node_strips, element_strips), two generators yielding blocks of whole columns in the
+    # same order and with the same ids as wedge(). Upper-half columns come first, then lower-half columns.
+    psi = np.pi/Ne
+
+    def node_strips():
+        first_id = 1
+        for upper, ncols in ((True, N+1), (False, N)):
+            for start, stop in strip_ranges(ncols, N+1, strip):
+                with stage('wedge.grid'):
+                    x_unit, y_unit = wedge_unit_strip(N, upper, start, stop, stations)
+                    x_i, y_i = H*x_unit, H*np.tan(psi)*y_unit
+                with stage('wedge.z'):
+                    z_i = get_z(x_i, y_i)
+                yield node_block(first_id, x_i, y_i, z_i)
+                first_id += x_i.size
+
+    def element_strips():
+        for upper in (True, False):
+            for start, stop in strip_ranges(N, N, strip):
+                yield wedge_element_strip(N, upper, start, stop)
+
+    return node_strips(), element_strips()
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.assembly import assemble, merge_nodes, rotation_matrices
+from src.pipeline import generate
+
+# The full umbrella is Ne rotated copies of the wedge with the nodes on shared ribs merged by a spatial hash
+# (assembly.py). These tests check the merge against brute force and the assembled mesh against the copies it is
+# built from.
+
+SHAPES = ['hypar', 'pyramid', 'dome']
+NE = [3, 4, 6, 12]
+
+
+def wedge(shape, Ne, N):
+    _, nodes, elements = generate(shape, 4.0, 1.5, Ne, N)
+    return nodes, elements
+
+
+def brute_force_groups(points, tol):
+    # Lowest index of the connected group of each point, joining points within tol of each other along every axis.
+    labels = np.arange(len(points))
+    close = (np.abs(points[:, None, :] - points[None, :, :]) <= tol/2).all(axis=2)
+    while True:
+        new_labels = np.where(close, labels[None, :], len(points)).min(axis=1)
+        if np.array_equal(new_labels, labels):
+            return labels
+        labels = new_labels
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_merge_nodes_matches_brute_force(seed):
+    # Lattice points far apart compared to tol, some repeated with jitter well inside tol.
+    rng = np.random.default_rng(seed)
+    tol = 1e-3
+    base = rng.integers(0, 10, size=(60, 3))*0.1
+    copies = base[rng.integers(0, len(base), size=60)] + rng.uniform(-0.1*tol, 0.1*tol, size=(60, 3))
+    points = np.vstack((base, copies))
+    np.testing.assert_array_equal(merge_nodes(points, tol), brute_force_groups(points, tol))
+
+
+def test_merge_nodes_keeps_separate_points():
+    points = np.array([[0.0, 0.0, 0.0], [2e-3, 0.0, 0.0], [0.0, 0.0, 2e-3], [1.0, 1.0, 1.0]])
+    np.testing.assert_array_equal(merge_nodes(points, 1e-3), np.arange(4))
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('Ne', NE)
+@pytest.mark.parametrize('N', [1, 2, 5])
+def test_assembled_node_count(shape, Ne, N):
+    nodes, elements = wedge(shape, Ne, N)
+    full_nodes, full_elements = assemble(nodes, elements, Ne)
+    # Each of the Ne ribs is shared by two copies and holds N nodes besides the apex, and the Ne apex copies become one.
+    assert len(full_nodes) == Ne*len(nodes) - Ne*N - (Ne - 1)
+    assert len(full_elements) == Ne*len(elements)
+    np.testing.assert_array_equal(full_nodes[:, 0], np.arange(1, len(full_nodes)+1))
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('Ne', NE)
+def test_no_coincident_nodes(shape, Ne):
+    full_nodes, _ = assemble(*wedge(shape, Ne, 6), Ne)
+    xyz = full_nodes[:, 1:4]
+    distance = np.sqrt(((xyz[:, None, :] - xyz[None, :, :])**2).sum(axis=2))
+    np.fill_diagonal(distance, np.inf)
+    assert distance.min() > 1e-6
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('Ne', NE)
+def test_elements_are_rotated_copies(shape, Ne):
+    # Element k*E + e of the umbrella has the corners of wedge element e rotated by copy k.
+    nodes, elements = wedge(shape, Ne, 4)
+    full_nodes, full_elements = assemble(nodes, elements, Ne)
+
+    def corners(nodes, elements):
+        xyz = np.vstack((np.zeros(3), nodes[:, 1:4]))
+        return xyz[np.asarray(elements[:, 1:5], dtype=np.int64)]
+
+    wedge_corners = corners(nodes, elements)
+    rotated = wedge_corners.copy()
+    expected = []
+    for R in rotation_matrices(Ne):
+        rotated[..., :2] = wedge_corners[..., :2] @ R.T
+        expected.append(np.where((elements[:, 1:5] > 0)[..., None], rotated, 0.0))
+    np.testing.assert_array_equal(full_elements[:, 1:5] > 0, np.tile(elements[:, 1:5] > 0, (Ne, 1)))
+    np.testing.assert_allclose(corners(full_nodes, full_elements), np.concatenate(expected), atol=1e-9)
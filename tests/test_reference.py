@@ -0,0 +1,182 @@
+import numpy as np
+import pytest
+
+from src.dome import dome, iter_dome
+from src.hypar import hypar, iter_hypar
+from src.pyramid import iter_pyramid, pyramid
+
+# The generators build nodes and connectivity with index arithmetic on arrays (hypar.py, wedge.py), which the topology
+# cache, the strip generators, grading, the frames and the symmetry compression all build on. These tests compare them
+# with the original per-node loop formulas, kept below as they were before vectorization, for small N and odd Ne where
+# an off-by-one in the index arithmetic shows up first.
+
+H, Re = 4.0, 1.5
+NE = [3, 5, 6, 7]
+N = [1, 2, 3, 5, 8]
+
+
+def reference_hypar(H, Re, Ne, N):
+    psi = np.pi/Ne
+
+    def get_z(xp, yp):
+        delta_y = (H - xp)*np.sin(2*psi) + xp*np.tan(psi)
+        delta_x = (H - xp)*np.cos(2*psi)
+        return Re*(1 - xp/H)*yp/np.sqrt(delta_x**2 + delta_y**2) + Re*xp/H
+
+    def get_K(xp):
+        delta_y = (H - xp)*np.sin(2*psi) + xp*np.tan(psi)
+        delta_x = (H - xp)*np.cos(2*psi)
+        psi_c = np.arctan(delta_x/delta_y)
+        return xp*np.sin(psi)/np.sin(np.pi/2 - psi - psi_c)
+
+    def get_xy(xp, yp):
+        delta_y = (H - xp)*np.sin(2*psi) + xp*np.tan(psi)
+        delta_x = (H - xp)*np.cos(2*psi)
+        y = yp/np.sqrt(1 + (delta_x/delta_y)**2)
+        return xp + y*(delta_x/delta_y), y
+
+    def sym(x, y):
+        theta = psi - np.arctan(y/x)
+        return x*np.cos(2*theta) - y*np.sin(2*theta), x*np.sin(2*theta) + y*np.cos(2*theta)
+
+    def rotate(x, y, theta, n):
+        return x*np.cos(theta*n) - y*np.sin(theta*n), x*np.sin(theta*n) + y*np.cos(theta*n)
+
+    xp_base_i = np.linspace(0, H, N+1)
+    xp_index_i = np.linspace(0, N, N+1)
+    nodes_tot = (N+1)**2
+    xp_i = np.zeros(nodes_tot)
+    index_i = np.zeros(nodes_tot)
+    n = 0
+    for col in range(N+1):
+        for i in range(col+1):
+            xp_base_i[i] = xp_base_i[int(xp_index_i[col])]
+            xp_index_i[i] = int(col)
+        for s in range(N+1):
+            xp_i[n] = xp_base_i[s]
+            index_i[n] = xp_index_i[s]
+            n += 1
+
+    yp_i = np.zeros(nodes_tot)
+    n = 0
+    for col in range(N+1):
+        for i in range(N+1):
+            yp_i[n] = np.linspace(0, get_K(xp_i[n]), int(index_i[n]+1))[min(i, col)]
+            n += 1
+
+    nodes_ij = np.array([get_xy(xp_i[i], yp_i[i]) + (get_z(xp_i[i], yp_i[i]),) for i in range(nodes_tot)]).T
+    nodes_mod_ij = np.copy(nodes_ij)
+    for col in range(N+1):
+        for i in range(col):
+            index = i + (N+1)*col
+            nodes_mod_ij[0][index], nodes_mod_ij[1][index] = sym(nodes_ij[0][index], nodes_ij[1][index])
+
+    nod_ij = np.zeros((nodes_tot, 4))
+    for i in range(nodes_tot):
+        x, y = rotate(nodes_mod_ij[0][i], nodes_mod_ij[1][i], -psi, 1)
+        nod_ij[i] = [i + 1, x, y, nodes_mod_ij[2][i]]
+
+    ele_ij = np.zeros((N**2, 5))
+    n = 0
+    for col in range(N):
+        for row in range(N):
+            base = col + 1 + N*col + row
+            ele_ij[n] = [n + 1, base, base + N + 1, base + N + 2, base + 1]
+            n += 1
+    return nod_ij, ele_ij
+
+
+def reference_wedge(H, Ne, N, get_z):
+    # The loops pyramid() and dome() shared, with dome()'s over-allocated element array.
+    psi = np.pi/Ne
+    nodes_tot = (N+1)**2
+    x_base_i = np.linspace(0, H, N+1)
+    x_i = np.zeros(nodes_tot)
+    y_i = np.zeros(nodes_tot)
+    n = 0
+    for col in range(N+1):
+        for i in range(N+1-col):
+            x_i[n] = x_base_i[i+col]
+            y_i[n] = x_base_i[col]*np.tan(psi)
+            n += 1
+    for col in range(N):
+        for i in range(N-col):
+            x_i[n] = x_base_i[i+1+col]
+            y_i[n] = -x_base_i[col+1]*np.tan(psi)
+            n += 1
+
+    nodes_ij = np.zeros((nodes_tot, 4))
+    for i in range(nodes_tot):
+        nodes_ij[i] = [i + 1, x_i[i], y_i[i], get_z(x_i[i], y_i[i])]
+
+    ele_ij = np.zeros((2*(N**2 + N) + 1, 5))
+    ele = 1
+    for col in range(N):
+        for i in range(N-col):
+            ele_ij[ele-1][0] = ele
+            ele_ij[ele-1][1] = ele + col
+            if i == 0:
+                ele_ij[ele-1][2] = ele_ij[ele-1][1] + (N+1) - col
+                ele_ij[ele-1][3] = ele_ij[ele-1][1] + 1
+            else:
+                ele_ij[ele-1][2] = ele_ij[ele-1][1] + N - col
+                ele_ij[ele-1][3] = ele_ij[ele-1][2] + 1
+                ele_ij[ele-1][4] = ele_ij[ele-1][1] + 1
+            ele += 1
+    for col in range(N):
+        for i in range(N-col):
+            ele_ij[ele-1][0] = ele
+            if i == 0:
+                ele_ij[ele-1][1] = ele + (N+1)
+                ele_ij[ele-1][2] = 1 if col == 0 else ele + col
+                ele_ij[ele-1][3] = ele_ij[ele-1][2] + 1
+            else:
+                ele_ij[ele-1][1] = ele + N
+                ele_ij[ele-1][2] = i + 1 if col == 0 else ele + col
+                ele_ij[ele-1][3] = ele_ij[ele-1][2] + 1
+                ele_ij[ele-1][4] = ele + (N+1)
+            ele += 1
+    return nodes_ij, ele_ij
+
+
+def reference_pyramid(H, Re, Ne, N):
+    nodes, elements = reference_wedge(H, Ne, N, lambda x, y: (Re/H)*x)
+    return nodes, elements[:N**2 + N]
+
+
+def reference_dome(H, Re, Ne, N):
+    psi = np.pi/Ne
+    return reference_wedge(H, Ne, N, lambda x, y: (Re*np.cos(psi)**2/H**2)*(x**2 + y**2))
+
+
+GENERATORS = {
+    'hypar': (hypar, iter_hypar, reference_hypar),
+    'pyramid': (pyramid, iter_pyramid, reference_pyramid),
+    'dome': (dome, iter_dome, reference_dome),
+}
+
+
+@pytest.mark.parametrize('shape', GENERATORS)
+@pytest.mark.parametrize('Ne', NE)
+@pytest.mark.parametrize('n', N)
+def test_matches_loop_reference(shape, Ne, n):
+    generate, _, reference = GENERATORS[shape]
+    nodes, elements = generate(H, Re, Ne, n)
+    ref_nodes, ref_elements = reference(H, Re, Ne, n)
+
+    # dome() used to leave trailing zero rows; the vectorized one is sized exactly.
+    assert not ref_elements[len(elements):].any()
+    np.testing.assert_array_equal(elements, ref_elements[:len(elements)])
+    np.testing.assert_array_equal(nodes[:, 0], ref_nodes[:, 0])
+    np.testing.assert_allclose(nodes[:, 1:], ref_nodes[:, 1:], rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('shape', GENERATORS)
+@pytest.mark.parametrize('n', N)
+@pytest.mark.parametrize('strip', [1, 2, 3])
+def test_strips_match_whole_mesh(shape, n, strip):
+    generate, iterate, _ = GENERATORS[shape]
+    nodes, elements = generate(H, Re, 5, n)
+    node_strips, element_strips = iterate(H, Re, 5, n, strip)
+    np.testing.assert_array_equal(np.concatenate(list(node_strips)), nodes)
+    np.testing.assert_array_equal(np.concatenate(list(element_strips)), elements)
@@ -0,0 +1,69 @@
+import sys
+
+import numpy as np
+import pytest
+
+from src.assembly import assemble
+from src.pipeline import generate
+from src.renumber import bandwidth, node_adjacency, rcm_order, renumber
+
+# renumber() must only change node ids: every element keeps its corners in place, and the bandwidth never grows. The
+# numpy Cuthill-McKee is what runs without scipy (requirements.txt does not list it), so these tests hide scipy to
+# always exercise it.
+
+
+@pytest.fixture(autouse=True)
+def numpy_rcm(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'scipy.sparse', None)
+    monkeypatch.setitem(sys.modules, 'scipy.sparse.csgraph', None)
+
+
+def corner_coordinates(nodes, elements):
+    # (E, 4, 3) corner coordinates per element, NaN for the missing 4th corner of triangles.
+    xyz = np.vstack((np.full(3, np.nan), np.asarray(nodes)[:, 1:4]))
+    return xyz[np.asarray(elements[:, 1:5], dtype=np.int64)]
+
+
+def mesh(shape, Ne, N, full):
+    _, nodes, elements = generate(shape, 4.0, 1.5, Ne, N, full)
+    return nodes, elements
+
+
+@pytest.mark.parametrize('shape', ['hypar', 'pyramid', 'dome'])
+@pytest.mark.parametrize('Ne, N, full', [(3, 1, False), (5, 4, False), (6, 12, False), (3, 3, True), (6, 8, True)])
+def test_renumber_keeps_geometry(shape, Ne, N, full):
+    nodes, elements = mesh(shape, Ne, N, full)
+    new_nodes, new_elements, (before, after) = renumber(nodes, elements)
+
+    np.testing.assert_array_equal(new_nodes[:, 0], np.arange(1, len(nodes)+1))
+    np.testing.assert_array_equal(new_elements[:, 0], elements[:, 0])
+    np.testing.assert_array_equal(corner_coordinates(new_nodes, new_elements), corner_coordinates(nodes, elements))
+    assert before == bandwidth(elements)
+    assert after == bandwidth(new_elements)
+    assert after <= before
+
+
+def test_rcm_order_is_a_permutation_per_component():
+    # Two separate tympans in one mesh: the second one's node ids follow the first's.
+    nodes, elements = mesh('dome', 6, 6, False)
+    second = np.array(elements)
+    second[:, 0] += len(elements)
+    second[:, 1:5] = np.where(second[:, 1:5] > 0, second[:, 1:5] + len(nodes), 0)
+    n = 2*len(nodes)
+    order = rcm_order(*node_adjacency(np.vstack((elements, second)), n))
+    np.testing.assert_array_equal(np.sort(order), np.arange(n))
+
+
+@pytest.mark.parametrize('shape', ['pyramid', 'dome'])
+def test_bandwidth_pyramid_N100(shape):
+    # The figures quoted in the README.
+    nodes, elements = mesh(shape, 6, 100, False)
+    assert renumber(nodes, elements)[2] == (5151, 102)
+
+
+def test_bandwidth_full_umbrella():
+    nodes, elements = assemble(*mesh('hypar', 6, 20, False), 6)
+    before, after = renumber(nodes, elements)[2]
+    # Nodes of the copies are numbered copy after copy, so the rib elements between the last and first copy span
+    # almost the whole mesh; RCM numbers around the umbrella in rings.
+    assert before > 10*after
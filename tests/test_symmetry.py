@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from src.assembly import assemble
+from src.pipeline import generate
+from src.symmetry import SymmetricMesh, load_symmetric, save_symmetric
+
+# A SymmetricMesh stores one wedge and the rib mapping; expanding it in one go or one copy at a time must give exactly
+# the umbrella assemble() builds, including node and element ids.
+
+SHAPES = ['hypar', 'pyramid', 'dome']
+NE = [3, 4, 6, 12]
+
+
+def wedge(shape, Ne, N):
+    _, nodes, elements = generate(shape, 4.0, 1.5, Ne, N)
+    return nodes, elements
+
+
+@pytest.mark.parametrize('shape', SHAPES)
+@pytest.mark.parametrize('Ne', NE)
+@pytest.mark.parametrize('N', [1, 5])
+def test_expand_and_wedges_match_assemble(shape, Ne, N):
+    nodes, elements = wedge(shape, Ne, N)
+    full_nodes, full_elements = assemble(nodes, elements, Ne)
+    mesh = SymmetricMesh.from_wedge(nodes, elements, Ne)
+
+    expanded_nodes, expanded_elements = mesh.expand()
+    np.testing.assert_array_equal(expanded_nodes, full_nodes)
+    np.testing.assert_array_equal(expanded_elements, full_elements)
+
+    wedges = [mesh.wedge(k) for k in range(Ne)]
+    np.testing.assert_array_equal(np.concatenate([n for n, _ in wedges]), full_nodes)
+    np.testing.assert_array_equal(np.concatenate([e for _, e in wedges]), full_elements)
+
+    assert (mesh.n_nodes, mesh.n_elements) == (len(full_nodes), len(full_elements))
+
+
+def test_iter_wedges_and_node_ids():
+    nodes, elements = wedge('dome', 6, 4)
+    mesh = SymmetricMesh.from_wedge(nodes, elements, 6)
+    full_nodes, full_elements = mesh.expand()
+
+    node_strips, element_strips = mesh.iter_wedges()
+    np.testing.assert_array_equal(np.concatenate(list(node_strips)), full_nodes)
+    np.testing.assert_array_equal(np.concatenate(list(element_strips)), full_elements)
+
+    # node_ids() of copy k gives the assembled ids used by that copy's elements.
+    E = len(elements)
+    for k in range(6):
+        ids = mesh.node_ids(k, np.asarray(elements[:, 1:4], dtype=np.int64) - 1)
+        np.testing.assert_array_equal(ids, full_elements[k*E:(k+1)*E, 1:4])
+
+
+def test_save_and_load(tmp_path):
+    nodes, elements = wedge('hypar', 5, 6)
+    path = save_symmetric(str(tmp_path / 'Hypar.sym'), SymmetricMesh.from_wedge(nodes, elements, 5))
+    mesh, meta = load_symmetric(path)
+    full_nodes, full_elements = assemble(nodes, elements, 5)
+    assert meta['nodes'] == [len(full_nodes), 4]
+    assert meta['elements'] == [len(full_elements), 5]
+    np.testing.assert_array_equal(mesh.expand()[0], full_nodes)
+    np.testing.assert_array_equal(mesh.expand()[1], full_elements)
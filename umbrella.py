@@ -1,18 +1,27 @@
 # umbrella.py (Optimized GUI Script)
 
+# Start-up timing: run with --startup-time (prints the timings and exits) or set UMBRELLA_STARTUP_TIME=1 (prints them and keeps running).
+import time
+t_start = time.perf_counter()
+
+import functools
+import glob
+import multiprocessing
 import os
+import queue
 import sys
-import numpy as np
-import matplotlib.pyplot as plt
-import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor
 from tkinter import *
-from tkinter import messagebox
-from PIL import ImageTk, Image
+from tkinter import messagebox, ttk
+
+# matplotlib and PIL are slow to import and only needed for previews (src/preview.py) and for rebuilding the schematic thumbnail, so they are imported on first use inside those functions instead of here. xlsxwriter is likewise imported by src/export.py only when a workbook is written.
 
 # The goal is to keep the project modular and scalable, that being said I have restructured the files so the main file 'umbrella.py' is outside of the 'src' folder which holds all the geometry functions. Here I have updated the file paths accordingly.
-from src.dome import dome
-from src.hypar import hypar
-from src.pyramid import pyramid
+from src import pipeline, profiling
+from src.pipeline import FORMATS, GEOMETRIES
+from src.quality import MeshQualityError
+
+t_imports = time.perf_counter()
 
 # This block of code supports both the development environment as well as the PyInstaller .exe bundled packaging. This also prevents errors when __file__ doesn't work inside a compiled binary.
 # ---------------- Setup Paths ---------------- #
@@ -26,165 +35,346 @@ else:
 output_dir = os.path.join(base_dir, "Output")
 os.makedirs(output_dir, exist_ok=True)
 
-# ---------------- GUI Setup ---------------- #
-master_window = Tk()
-master_window.title('Umbrella')
-icon_path = os.path.join(base_path, 'logo.ico')
-master_window.iconbitmap(icon_path)
-#master_window.iconbitmap(os.path.join(os.getcwd(), 'logo.ico'))  See not above on Setup Paths.
-
-root = Frame(master_window)
-root.grid(row=0, column=0, sticky=W+E)
-
-entry_width = 30
-font_head = 'Helvetica 12 bold'
-font_type = 'Helvetica 12'
-
-Label(root, text='Enter geometric parameters', font=font_head).grid(row=0, column=0, columnspan=2)
-
-# Enter number of sides
-Label(root, text='Number of sides', font=font_type).grid(sticky=W, row=1, column=0)
-ent_Ne = Entry(root, width=entry_width)
-ent_Ne.grid(row=1, column=1)
-
-# Enter length of apothem
-Label(root, text='Length of Apothem (H)', font=font_type).grid(sticky=W, row=2, column=0)
-ent_H = Entry(root, width=entry_width)
-ent_H.grid(row=2, column=1)
-
-# Enter rise of umbrella
-Label(root, text='Rise of umbrella (Re)', font=font_type).grid(sticky=W, row=3, column=0)
-ent_Re = Entry(root, width=entry_width)
-ent_Re.grid(row=3, column=1)
-
-# Enter number of elements along apothem
-Label(root, text='Number of elements along Apothem', font=font_type).grid(sticky=W, row=4, column=0)
-ent_N = Entry(root, width=entry_width)
-ent_N.grid(row=4, column=1)
-
-Label(root, text='Select tympan geometries to generate as SAP2000 input', font=font_head).grid(row=5, column=0, columnspan=2)
-
-var_hypar = IntVar()
-var_pyramid = IntVar()
-var_dome = IntVar()
-
-# If not planning to reuse or reference this, we would not assign this to a variable. If we do need to change the button later, use this:
-# c_hypar = Checkbutton(root, text='Generate hypar tympan', font=font_type, variable=var_hypar)
-# c_hypar.grid(sticky=W, row=6, column=0)
-# This way, c_hypar holds a reference to the widget.
-Checkbutton(root, text='Generate hypar tympan', font=font_type, variable=var_hypar).grid(sticky=W, row=6, column=0)
-Checkbutton(root, text='Generate pyramidal tympan', font=font_type, variable=var_pyramid).grid(sticky=W, row=7, column=0)
-Checkbutton(root, text='Generate parabolic tympan', font=font_type, variable=var_dome).grid(sticky=W, row=8, column=0)
-
-# Load and display schematic image only once, original code did this twice which took up a lot of memory and slowed the program substantially.
-# img_path = os.path.join(os.getcwd(), 'Geometry.png')   
-# # Combine current working directory with image to create the full file path
-# ---------------- Load Schematic Image ---------------- #
-img_path = os.path.join(base_path, 'Geometry.png')
-if os.path.exists(img_path):  # Check if the file path exists before trying to open it to prevent file not found errors. Prevents crashes if image is missing.
-    img = Image.open(img_path)  # Uses PIL (Python Imaging Library) to open the image file
-    ratio = 0.7
-    img_resized = img.resize((int(img.width * ratio), int(img.height * ratio)))  # Scales the image cleanly without reloading or redundant PhotoImage calls.
-    schematic = ImageTk.PhotoImage(img_resized)  # Converts the resized image to a format Tkinter can display (ImageTk.PhotoImage)
-    img_label = Label(image=schematic)
-    img_label.image = schematic  # Prevent garbage collection
-    img_label.grid(row=10, column=0, columnspan=2)
-
-    #Label(image=schematic).grid(row=10, column=0)  # Places the image inside a Label widget and shows in GUI grid at row 10, column 0
-
-# ---------------- Run Function ---------------- #
-def run():
-    # Before there was no error handling and the program would crash if a field was left blank or if the user entered an invalid value. Now we prevent program crashing and gives users a helpful pop-up with instructions on what went wrong instead of a terminal stacktrace.
-    try:
-        Ne = int(ent_Ne.get())
-        H = float(ent_H.get())
-        Re = float(ent_Re.get())
-        N = int(ent_N.get())
-    except ValueError:
-        messagebox.showerror("Input Error", "Please enter valid numerical values.")
-        return
-
-    # Reusable helper function. Reduces redundant code of 30+ lines for each geometry type. Easier to maintain and update. Creates workbook, writes nodes and elements and plots the 3D view. Easier to debug, test and add new shapes.
-    def generate_and_export(name, nodes, elements):
+# ---------------- Worker Callbacks ---------------- #
+# These run inside the worker processes (see Background Worker below), so they live outside the __main__ guard: spawned workers import this script as __mp_main__ and only need these definitions, not the window.
+class Cancelled(Exception):
+    pass
+
+
+def report_stage(events, cancel_event, shape, preview_args, stage):
+    # on_stage callback of pipeline.generate_and_export(). Cancellation is checked between stages; a stage that has started runs to completion.
+    if cancel_event.is_set():
+        raise Cancelled
+    if stage == 'exporting':
+        events.put(('preview', shape, preview_args))  # Generated: preview while the file is written
+    events.put(('status', shape, stage))
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # Needed for worker processes in the PyInstaller .exe
+
+    # ---------------- GUI Setup ---------------- #
+    master_window = Tk()
+    master_window.title('Umbrella')
+    icon_path = os.path.join(base_path, 'logo.ico')
+    master_window.iconbitmap(icon_path)
+    #master_window.iconbitmap(os.path.join(os.getcwd(), 'logo.ico'))  See not above on Setup Paths.
+
+    root = Frame(master_window)
+    root.grid(row=0, column=0, sticky=W+E)
+
+    entry_width = 30
+    font_head = 'Helvetica 12 bold'
+    font_type = 'Helvetica 12'
+
+    Label(root, text='Enter geometric parameters', font=font_head).grid(row=0, column=0, columnspan=2)
+
+    # Enter number of sides
+    Label(root, text='Number of sides', font=font_type).grid(sticky=W, row=1, column=0)
+    ent_Ne = Entry(root, width=entry_width)
+    ent_Ne.grid(row=1, column=1)
+
+    # Enter length of apothem
+    Label(root, text='Length of Apothem (H)', font=font_type).grid(sticky=W, row=2, column=0)
+    ent_H = Entry(root, width=entry_width)
+    ent_H.grid(row=2, column=1)
+
+    # Enter rise of umbrella
+    Label(root, text='Rise of umbrella (Re)', font=font_type).grid(sticky=W, row=3, column=0)
+    ent_Re = Entry(root, width=entry_width)
+    ent_Re.grid(row=3, column=1)
+
+    # Enter number of elements along apothem
+    Label(root, text='Number of elements along Apothem', font=font_type).grid(sticky=W, row=4, column=0)
+    ent_N = Entry(root, width=entry_width)
+    ent_N.grid(row=4, column=1)
+
+    Label(root, text='Select tympan geometries to generate as SAP2000 input', font=font_head).grid(row=5, column=0, columnspan=2)
+
+    var_hypar = IntVar()
+    var_pyramid = IntVar()
+    var_dome = IntVar()
+
+    # If not planning to reuse or reference this, we would not assign this to a variable. If we do need to change the button later, use this:
+    # c_hypar = Checkbutton(root, text='Generate hypar tympan', font=font_type, variable=var_hypar)
+    # c_hypar.grid(sticky=W, row=6, column=0)
+    # This way, c_hypar holds a reference to the widget.
+    Checkbutton(root, text='Generate hypar tympan', font=font_type, variable=var_hypar).grid(sticky=W, row=6, column=0)
+    Checkbutton(root, text='Generate pyramidal tympan', font=font_type, variable=var_pyramid).grid(sticky=W, row=7, column=0)
+    Checkbutton(root, text='Generate parabolic tympan', font=font_type, variable=var_dome).grid(sticky=W, row=8, column=0)
+
+    # Off by default: export the single tympan wedge. When checked, the Ne rotated tympans are assembled into the full umbrella with their shared rib nodes merged.
+    var_full = IntVar()
+    Checkbutton(root, text='Assemble full umbrella', font=font_type, variable=var_full).grid(sticky=W, row=9, column=0)
+
+    # Off by default: keep the generators' node numbering. When checked, nodes are renumbered (Reverse Cuthill-McKee, src/renumber.py) so the node ids of each element are close together, which narrows the stiffness matrix bandwidth in SAP2000.
+    var_renumber = IntVar()
+    Checkbutton(root, text='Renumber nodes (RCM)', font=font_type, variable=var_renumber).grid(sticky=W, row=10, column=0)
+
+    # Output format: Excel workbook (default), SAP2000 .s2k text input, plain CSV tables, the binary mesh store, or the symmetry-compressed full umbrella (sym, always the full umbrella).
+    var_format = StringVar(value='xlsx')
+    OptionMenu(root, var_format, *FORMATS).grid(row=9, column=1)
+
+    # Load and display schematic image only once, original code did this twice which took up a lot of memory and slowed the program substantially.
+    # img_path = os.path.join(os.getcwd(), 'Geometry.png')   
+    # # Combine current working directory with image to create the full file path
+    # ---------------- Load Schematic Image ---------------- #
+    def load_schematic(img_path, ratio=0.7):
+        # Decoding the full-size PNG and resizing it with PIL on every start is slow, so the resized image is cached next to the app as a pre-scaled PNG that Tk can load by itself. The cache name carries the source size and modification time, so a changed Geometry.png regenerates it.
+        st = os.stat(img_path)
+        cache_dir = os.path.join(base_dir, '.cache')
+        thumb_path = os.path.join(cache_dir, f"schematic_{st.st_size}_{st.st_mtime_ns}_{int(ratio * 100)}.png")
+
+        if not os.path.exists(thumb_path):
+            from PIL import Image  # Only needed when the thumbnail has to be rebuilt
+            img = Image.open(img_path)  # Uses PIL (Python Imaging Library) to open the image file
+            img_resized = img.resize((int(img.width * ratio), int(img.height * ratio)))  # Scales the image cleanly without reloading or redundant PhotoImage calls.
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                for old in glob.glob(os.path.join(cache_dir, 'schematic_*.png')):
+                    os.remove(old)
+                tmp_path = thumb_path + '.tmp'
+                img_resized.save(tmp_path, format='PNG')
+                os.replace(tmp_path, thumb_path)
+            except OSError:
+                # Read-only install location: show the resized image without caching it.
+                from PIL import ImageTk
+                return ImageTk.PhotoImage(img_resized)
+
+        return PhotoImage(file=thumb_path)  # Tk reads PNG natively, no PIL import on a cache hit
+
+
+    img_path = os.path.join(base_path, 'Geometry.png')
+    if os.path.exists(img_path):  # Check if the file path exists before trying to open it to prevent file not found errors. Prevents crashes if image is missing.
+        schematic = load_schematic(img_path)
+        img_label = Label(image=schematic)
+        img_label.image = schematic  # Prevent garbage collection
+        img_label.grid(row=10, column=0, columnspan=2)
+
+        #Label(image=schematic).grid(row=10, column=0)  # Places the image inside a Label widget and shows in GUI grid at row 10, column 0
+
+    # ---------------- Background Worker ---------------- #
+    # The selected shapes are generated and exported in a pool of worker processes, so a run takes about as long as the slowest shape rather than the sum of all of them, and the window stays responsive. Workers never touch Tk or matplotlib: they send (kind, shape, payload) events through a queue which the Tk event loop drains with after(), so all widgets and previews are updated from the main thread. Finished jobs are collected from their futures in the order they complete.
+    executor = None
+    events = None
+    cancel_event = None
+    jobs = {}
+
+
+    def start_workers():
+        # Created on the first run, so start-up does not pay for launching processes. Workers are spawned (not forked) on every platform, forking a process that runs Tk is not safe.
+        global executor, events, cancel_event
+        if executor is None:
+            context = multiprocessing.get_context('spawn')
+            manager = context.Manager()
+            events = manager.Queue()
+            cancel_event = manager.Event()
+            executor = ProcessPoolExecutor(max_workers=len(GEOMETRIES), mp_context=context)
+
+
+    # ---------------- Embedded Preview ---------------- #
+    # One tab per shape, each holding a MeshPreview canvas that is created on first use (which is also when matplotlib gets imported) and then updated in place on later runs.
+    preview_tabs = ttk.Notebook(master_window)
+    preview_tabs.grid(row=0, column=2, rowspan=11, sticky='nsew')
+    previews = {}
+
+
+    def show_preview(shape, H, Re, Ne, N, full):
+        if shape not in previews:
+            from src.preview import MeshPreview
+            tab = Frame(preview_tabs)
+            preview_tabs.add(tab, text=GEOMETRIES[shape][0])
+            previews[shape] = MeshPreview(tab)
+            previews[shape].widget.pack(fill=BOTH, expand=True)
+        preview = previews[shape]
+        preview_tabs.select(preview.widget.master)
+        preview.show_shape(shape, H, Re, Ne, N, full)
+
+
+    def poll_events():
+        while True:
+            try:
+                kind, shape, payload = events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'status':
+                status.set(f"{GEOMETRIES[shape][0]}: {payload}...")
+            elif kind == 'preview':
+                show_preview(shape, *payload)
+                progress['value'] += 1
+                jobs[shape][1] = True
+
+        for shape, (future, previewed, preview_args, job_args) in list(jobs.items()):
+            if not future.done():
+                continue
+            del jobs[shape]
+            name = GEOMETRIES[shape][0]
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if isinstance(error, Cancelled):
+                continue
+            if isinstance(error, MeshQualityError):
+                # The quality check (src/quality.py) refused the mesh before anything was written. Its thresholds only flag meshes that are likely to give SAP2000 trouble, so the user gets the report and can still export it unchecked.
+                if messagebox.askyesno("Mesh Quality", f"{name}: {error}\n\nExport this mesh anyway?"):
+                    if previewed:
+                        progress['value'] -= 1  # The resubmitted job counts its 'generated' step again
+                    submit(*job_args, quality=False)
+                continue
+            if error is not None:
+                messagebox.showerror("Export Error", f"{name}: {error}")
+                continue
+            if not previewed:
+                # Cached result: no stages ran in the worker, so the preview is drawn now.
+                show_preview(shape, *preview_args)
+                progress['value'] += 1
+            filepath = future.result()
+            if profiling.trace_path():
+                filepath, worker_events = filepath
+                profiling.add_events(worker_events)
+            status.set(f"{name}: saved {os.path.basename(filepath)}")
+            progress['value'] += 1
+
+        if jobs:
+            master_window.after(100, poll_events)
+        else:
+            if cancel_event.is_set():
+                status.set('Cancelled')
+            btn_run.config(state=NORMAL)
+            btn_cancel.config(state=DISABLED)
+
+
+    def cancel():
+        cancel_event.set()
+        for future, *_ in jobs.values():
+            future.cancel()  # Jobs that have not started yet are dropped; running ones stop at their next stage
+        status.set('Cancelling...')
+        btn_cancel.config(state=DISABLED)
+
+
+    # ---------------- Run Function ---------------- #
+    def run():
+        # Before there was no error handling and the program would crash if a field was left blank or if the user entered an invalid value. Now we prevent program crashing and gives users a helpful pop-up with instructions on what went wrong instead of a terminal stacktrace.
+        try:
+            Ne = int(ent_Ne.get())
+            H = float(ent_H.get())
+            Re = float(ent_Re.get())
+            N = int(ent_N.get())
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter valid numerical values.")
+            return
+
+        # Now we can easily add more shape types by registering them in GEOMETRIES (src/pipeline.py) and adding a checkbox here.
+        selected = [shape for shape, var in (('hypar', var_hypar), ('pyramid', var_pyramid), ('dome', var_dome)) if var.get()]
+        if not selected:
+            return
+        start_jobs(selected, Ne, H, Re, N, bool(var_full.get()))
+
+        # def generate_and_export(name, nodes, elements):
+        #     fig = plt.figure()
+        #     ax = fig.add_subplot(111, projection='3d')
+        #     ax.set_xlim([-H, H])
+        #     ax.set_ylim([-H, H])
+        #     ax.set_zlim([-H, H])
+        #     ax.scatter(nodes[:, 1], nodes[:, 2], nodes[:, 3], color='black')
+        #     plt.tight_layout()
+        #     plt.show()
+
+        #     filename = f"{name}{Ne}_H{H}_R{Re}_N{N}.xlsx"
+        #     wb = xlsxwriter.Workbook(filename)
+
+        #     ws_nodes = wb.add_worksheet('Nodes')
+        #     for i, row in enumerate(nodes):
+        #         ws_nodes.write(i, 0, row[0])
+        #         ws_nodes.write(i, 3, row[1])
+        #         ws_nodes.write(i, 4, row[2])
+        #         ws_nodes.write(i, 6, row[3])
+
+        #     ws_elements = wb.add_worksheet('Elements')
+        #     for i, row in enumerate(elements):
+        #         for j in range(5):
+        #             ws_elements.write(i, j, row[j])
+
+        #     wb.close()
+
+
+    def start_jobs(selected, Ne, H, Re, N, full):
+        # Shared by Run and the explorer's Export button.
         # Puts the created Excel files into the Output folder and creates this folder if it does not exist. Prevents file clutter and makes .exe packaging predictable.
         output_dir = os.path.join(os.getcwd(), "Output")
-        os.makedirs(output_dir, exist_ok=True)  # Create Output folder if it doesn't exist
-
-        filename = f"{name}{Ne}_H{H}_R{Re}_N{N}.xlsx"
-        filepath = os.path.join(output_dir, filename)
-        
-        fig = plt.figure()
-        ax = fig.add_subplot(111, projection='3d')
-        ax.set_xlim([-H, H])
-        ax.set_ylim([-H, H])
-        ax.set_zlim([-H, H])
-        ax.scatter(nodes[:, 1], nodes[:, 2], nodes[:, 3], color='black')
-        plt.tight_layout()
-        plt.show()
-
-        wb = xlsxwriter.Workbook(filepath)
-
-        ws_nodes = wb.add_worksheet('Nodes')
-        for i, row in enumerate(nodes):
-            ws_nodes.write(i, 0, row[0])
-            ws_nodes.write(i, 3, row[1])
-            ws_nodes.write(i, 4, row[2])
-            ws_nodes.write(i, 6, row[3])
-
-        ws_elements = wb.add_worksheet('Elements')
-        for i, row in enumerate(elements):
-            for j in range(5):
-                ws_elements.write(i, j, row[j])
-
-        wb.close()
-
-    # def generate_and_export(name, nodes, elements):
-    #     fig = plt.figure()
-    #     ax = fig.add_subplot(111, projection='3d')
-    #     ax.set_xlim([-H, H])
-    #     ax.set_ylim([-H, H])
-    #     ax.set_zlim([-H, H])
-    #     ax.scatter(nodes[:, 1], nodes[:, 2], nodes[:, 3], color='black')
-    #     plt.tight_layout()
-    #     plt.show()
-
-    #     filename = f"{name}{Ne}_H{H}_R{Re}_N{N}.xlsx"
-    #     wb = xlsxwriter.Workbook(filename)
-
-    #     ws_nodes = wb.add_worksheet('Nodes')
-    #     for i, row in enumerate(nodes):
-    #         ws_nodes.write(i, 0, row[0])
-    #         ws_nodes.write(i, 3, row[1])
-    #         ws_nodes.write(i, 4, row[2])
-    #         ws_nodes.write(i, 6, row[3])
-
-    #     ws_elements = wb.add_worksheet('Elements')
-    #     for i, row in enumerate(elements):
-    #         for j in range(5):
-    #             ws_elements.write(i, j, row[j])
-
-    #     wb.close()
-
-    if var_hypar.get():
-        nodes, elements = hypar(H, Re, Ne, N)   # Call the geometry function once and unpack both arrays efficiently.
-        generate_and_export("Hypar", nodes, elements)
-
-    if var_pyramid.get():
-        nodes, elements = pyramid(H, Re, Ne, N)   # Call the geometry function once and unpack both arrays efficiently.
-        generate_and_export("Pyramid", nodes, elements)
-
-    if var_dome.get():
-        nodes, elements = dome(H, Re, Ne, N)   # Call the geometry function once and unpack both arrays efficiently.
-        generate_and_export("Parabola", nodes, elements)
-    
-    # Now we can easily add more shape types:
-    #   if var_ellipse.get():
-    #       nodes, elements = ellipse(H, Re, Ne, N)
-    #       generate_ and_export("Ellipse", nodes, elements)
-
-# Run Button with optional threading for responsiveness
-Button(root, text='Run', width=15, height=2, command=run).grid(row=6, column=1, rowspan=3)
-
-# ---------------- Launch ---------------- #
-# Start the GUI event loop
-root.mainloop()
\ No newline at end of file
+        start_workers()
+        cancel_event.clear()
+        progress.config(maximum=2*len(selected), value=0)  # Two steps per shape: generated, exported
+        btn_run.config(state=DISABLED)
+        btn_cancel.config(state=NORMAL)
+        status.set('Running...')
+        full = full or var_format.get() == 'sym'
+        for shape in selected:
+            submit(shape, output_dir, (H, Re, Ne, N, full), var_format.get(), bool(var_renumber.get()))
+        master_window.after(100, poll_events)
+
+
+    def submit(shape, output_dir, preview_args, fmt, renumber_nodes, quality=True):
+        # Geometry, optional full-umbrella assembly and export live in src/pipeline.py, shared with the headless command line (src/cli.py). Outputs go through the result cache (src/cache.py), so an unchanged earlier file is returned without any stages running.
+        H, Re, Ne, N, full = preview_args
+        on_stage = functools.partial(report_stage, events, cancel_event, shape, preview_args)
+        job = functools.partial(pipeline.generate_and_export, shape, Ne, H, Re, N, output_dir, fmt, full,
+                                on_stage=on_stage, renumber_nodes=renumber_nodes, quality=quality)
+        if profiling.trace_path():
+            # Traced run (UMBRELLA_TRACE): the worker returns its stage events with the result and poll_events merges them into this process's trace, as the command line does.
+            future = executor.submit(profiling.run_traced, profiling.trace_path(), job)
+        else:
+            future = executor.submit(job)
+        # Kept with the job so a mesh that fails the quality check can be exported anyway (see poll_events).
+        jobs[shape] = [future, False, preview_args, (shape, output_dir, preview_args, fmt, renumber_nodes)]
+
+    # Run and Cancel buttons. Work happens in worker processes, so the window stays responsive while shapes are generated and exported.
+    btn_run = Button(root, text='Run', width=15, height=2, command=run)
+    btn_run.grid(row=6, column=1, rowspan=2)
+    btn_cancel = Button(root, text='Cancel', width=15, state=DISABLED, command=cancel)
+    btn_cancel.grid(row=8, column=1)
+
+    # ---------------- Exploration Mode ---------------- #
+    # Sliders for Ne, H, Re and N in their own window (src/explorer.py) redraw a preview as they move, without generating the full mesh or writing files. Its Export button copies the chosen parameters into this form and runs that shape through the normal workers, cache and output format.
+    def explore():
+        from src.explorer import ParameterExplorer  # Imports matplotlib, so only when first opened
+        try:
+            initial = {'Ne': int(ent_Ne.get()), 'H': float(ent_H.get()), 'Re': float(ent_Re.get()), 'N': int(ent_N.get())}
+        except ValueError:
+            initial = {}
+        ParameterExplorer(master_window, export_explored, full=bool(var_full.get()), **initial)
+
+
+    def export_explored(shape, Ne, H, Re, N, full):
+        if jobs:
+            messagebox.showinfo("Export", "Wait for the current run to finish before exporting.")
+            return
+        for entry, value in ((ent_Ne, Ne), (ent_H, H), (ent_Re, Re), (ent_N, N)):
+            entry.delete(0, END)
+            entry.insert(0, str(value))
+        var_full.set(int(full))
+        start_jobs([shape], Ne, H, Re, N, full)
+
+    Button(root, text='Explore...', width=15, command=explore).grid(row=10, column=1)
+
+    # Progress bar and status line for the current run
+    progress = ttk.Progressbar(root, mode='determinate')
+    progress.grid(row=11, column=0, columnspan=2, sticky=W+E)
+    status = StringVar(value='Ready')
+    Label(root, textvariable=status, font=font_type).grid(sticky=W, row=12, column=0, columnspan=2)
+
+    # ---------------- Start-up Timing ---------------- #
+    def report_startup():
+        master_window.update_idletasks()
+        t_ready = time.perf_counter()
+        print(f"Window ready after {(t_ready - t_start) * 1000:.0f} ms "
+              f"(imports {(t_imports - t_start) * 1000:.0f} ms, GUI and schematic {(t_ready - t_imports) * 1000:.0f} ms)")
+        if '--startup-time' in sys.argv:
+            master_window.destroy()
+
+    if '--startup-time' in sys.argv or os.environ.get('UMBRELLA_STARTUP_TIME'):
+        master_window.after(0, report_startup)
+
+    # ---------------- Launch ---------------- #
+    # Start the GUI event loop
+    root.mainloop()
\ No newline at end of file